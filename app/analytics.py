@@ -10,64 +10,296 @@ Provides six analytics features:
 6. Low confidence responses
 """
 
+import functools
 import logging
+import threading
+import time
 from datetime import datetime, timezone, timedelta
 from typing import Optional
-from collections import Counter
 
-from sqlalchemy import func, desc, cast, Date
+import orjson
+from sqlalchemy import (
+    func, desc, cast, Date, Integer, Numeric, Text, select, union_all, and_, or_,
+    case, true, literal, null, tuple_,
+)
+from sqlalchemy.dialects.postgresql import aggregate_order_by
 from openai import OpenAI
 
-from app.models import SessionLocal, Message, Conversation
-from app.config import OPENAI_API_KEY, LOW_CONFIDENCE_THRESHOLD
+from app.models import (
+    SessionLocal,
+    Message,
+    Conversation,
+    MessageDailyRollup,
+    CategoryDailyRollup,
+    WeeklySummary,
+)
+from app.config import (
+    OPENAI_API_KEY,
+    LOW_CONFIDENCE_THRESHOLD,
+    ANALYTICS_CACHE_TTL,
+)
+from app.rollup import day_start, get_rollup_watermark, source_categories
 
 logger = logging.getLogger(__name__)
 openai_client = OpenAI(api_key=OPENAI_API_KEY)
 
 
+# ═══════════════════════════════════════════════════════════
+# Result Cache (TTL, in-memory)
+# ═══════════════════════════════════════════════════════════
+
+_RESULT_CACHE_MAX_SIZE = 128
+_result_cache = {}
+_result_cache_lock = threading.Lock()
+
+
+def _ttl_cached(ttl_seconds: int):
+    """
+    Memoize an analytics function for `ttl_seconds`, keyed by its name and
+    arguments. Dashboards poll with identical
+    parameters, so repeat calls skip the SQL work entirely.
+    Callers pass `force=True` to bypass and refresh the cached entry.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, force: bool = False, **kwargs):
+            key = (fn.__name__, args, tuple(sorted(kwargs.items())))
+
+            if not force:
+                with _result_cache_lock:
+                    entry = _result_cache.get(key)
+                if entry and time.time() - entry["timestamp"] < ttl_seconds:
+                    return entry["result"]
+
+            result = fn(*args, **kwargs)
+
+            with _result_cache_lock:
+                _result_cache.pop(key, None)
+                if len(_result_cache) >= _RESULT_CACHE_MAX_SIZE:
+                    _result_cache.pop(next(iter(_result_cache)))
+                _result_cache[key] = {"result": result, "timestamp": time.time()}
+            return result
+        return wrapper
+    return decorator
+
+
 def _get_date_filter(days: int = 30):
     """Return a datetime for filtering by recent period."""
     return datetime.now(timezone.utc) - timedelta(days=days)
 
 
+def _split_period(db, since, rollup_date=MessageDailyRollup.date):
+    """
+    Split [since, now) into the days served by the daily rollup and the
+    remainder that must still be read from raw messages (the partial first
+    day plus everything after the rollup watermark).
+
+    Returns (rollup_filter, raw_filter); rollup_filter is None when the
+    rollup does not cover any full day of the period, and otherwise
+    filters `rollup_date` (the date column of the rollup table read).
+    """
+    watermark = get_rollup_watermark(db)
+    first_full_day = since.date() + timedelta(days=1)
+
+    if watermark is None or watermark <= first_full_day:
+        return None, Message.timestamp >= since
+
+    rollup_filter = and_(
+        rollup_date >= first_full_day,
+        rollup_date < watermark,
+    )
+    raw_filter = and_(
+        Message.timestamp >= since,
+        or_(
+            Message.timestamp < day_start(first_full_day),
+            Message.timestamp >= day_start(watermark),
+        ),
+    )
+    return rollup_filter, raw_filter
+
+
+def _query_counts(db, since):
+    """
+    Per-query message count and confidence sum over the period, combining
+    rolled-up days with raw messages. Returns a subquery with columns
+    (query_normalized, query, message_count, confidence_sum), where `query`
+    is one original wording of the normalized question.
+    """
+    rollup_filter, raw_filter = _split_period(db, since)
+
+    raw = (
+        select(
+            Message.query_normalized.label("query_normalized"),
+            func.min(Message.query).label("query"),
+            func.count(Message.id).label("message_count"),
+            func.sum(Message.confidence).label("confidence_sum"),
+        )
+        .where(raw_filter)
+        .group_by(Message.query_normalized)
+    )
+    if rollup_filter is None:
+        return raw.subquery()
+
+    rolled = (
+        select(
+            MessageDailyRollup.query_normalized,
+            MessageDailyRollup.query,
+            MessageDailyRollup.message_count,
+            MessageDailyRollup.confidence_sum,
+        )
+        .where(rollup_filter)
+    )
+    return union_all(raw, rolled).subquery()
+
+
+def _ranked_queries_select(counts, limit: int):
+    """
+    Rank the `_query_counts` subquery: (query, count, avg_confidence,
+    total_messages) rows, where total_messages is the whole period's count
+    (a window over every group, computed before the limit). Counts are
+    cast to integers, since Postgres sums them as numeric and they would
+    otherwise come back as Decimal.
+    """
+    total = cast(func.sum(counts.c.message_count), Integer)
+    return (
+        select(
+            func.min(counts.c.query).label("query"),
+            total.label("count"),
+            (func.sum(counts.c.confidence_sum) / total).label("avg_confidence"),
+            cast(func.sum(func.sum(counts.c.message_count)).over(), Integer)
+            .label("total_messages"),
+        )
+        .group_by(counts.c.query_normalized)
+        .order_by(desc("count"))
+        .limit(limit)
+    )
+
+
+def _ranked_queries(db, since, limit: int):
+    """Top normalized queries by count; see `_ranked_queries_select`."""
+    return db.execute(_ranked_queries_select(_query_counts(db, since), limit)).all()
+
+
+def _period_totals(db, since):
+    """
+    Message, unanswered and low-confidence counts and the confidence sum
+    over the period, combining rolled-up days with raw messages.
+
+    Returns a row (message_count, confidence_sum, unanswered_count,
+    low_confidence_count).
+    """
+    rollup_filter, raw_filter = _split_period(db, since)
+
+    parts = [
+        select(
+            func.count(Message.id).label("message_count"),
+            func.sum(Message.confidence).label("confidence_sum"),
+            func.count(Message.id).filter(Message.is_unanswered == True)
+            .label("unanswered_count"),
+            func.count(Message.id).filter(Message.is_low_confidence == True)
+            .label("low_confidence_count"),
+        )
+        .where(raw_filter)
+    ]
+    if rollup_filter is not None:
+        parts.append(
+            select(
+                func.sum(MessageDailyRollup.message_count),
+                func.sum(MessageDailyRollup.confidence_sum),
+                func.sum(MessageDailyRollup.unanswered_count),
+                func.sum(MessageDailyRollup.low_confidence_count),
+            )
+            .where(rollup_filter)
+        )
+    totals = union_all(*parts).subquery()
+
+    def count(column):
+        return cast(func.coalesce(func.sum(column), 0), Integer)
+
+    return db.execute(
+        select(
+            count(totals.c.message_count).label("message_count"),
+            func.coalesce(func.sum(totals.c.confidence_sum), 0.0).label("confidence_sum"),
+            count(totals.c.unanswered_count).label("unanswered_count"),
+            count(totals.c.low_confidence_count).label("low_confidence_count"),
+        )
+    ).one()
+
+
+def _sql_round(db, column, digits: int):
+    """round() in SQL; Postgres only rounds numerics to a fixed scale."""
+    if db.bind.dialect.name == "postgresql":
+        column = cast(column, Numeric)
+    return func.round(column, digits)
+
+
+def _sql_isoformat(db, column):
+    """
+    A naive timestamp rendered like datetime.isoformat(), in SQL: both
+    dialects always produce six fractional digits, so a zero fraction is
+    dropped as isoformat() does.
+    """
+    if db.bind.dialect.name == "postgresql":
+        rendered = func.to_char(column, 'YYYY-MM-DD"T"HH24:MI:SS.US')
+    else:
+        rendered = func.replace(column, " ", "T")
+    return func.replace(rendered, ".000000", "")
+
+
+def _json_rows(db, rows, keys, order_by, json_keys=()) -> list:
+    """
+    Shape the already-limited subquery `rows` into a JSON array of objects
+    in the database and return it parsed. Keys in `json_keys` hold JSON
+    values and are embedded as such rather than as strings.
+    """
+    pg = db.bind.dialect.name == "postgresql"
+    pairs = []
+    for key in keys:
+        value = rows.c[key]
+        if key in json_keys and not pg:
+            value = func.json(value)
+        pairs += [key, value]
+
+    if pg:
+        aggregate = func.json_agg(
+            aggregate_order_by(func.json_build_object(*pairs), order_by)
+        )
+    else:
+        # SQLite aggregates the ordered subquery in its row order
+        aggregate = func.json_group_array(func.json_object(*pairs))
+
+    result = db.execute(select(aggregate).select_from(rows)).scalar()
+    if isinstance(result, str):
+        result = orjson.loads(result)
+    return result or []
+
+
 # ═══════════════════════════════════════════════════════════
 # 1. Most Asked Questions (Ranked)
 # ═══════════════════════════════════════════════════════════
 
+@_ttl_cached(ANALYTICS_CACHE_TTL)
 def get_top_questions(days: int = 30, limit: int = 20) -> dict:
     """
     Returns the most frequently asked questions, ranked by count.
-    Groups similar questions together using exact match for now.
+    Groups questions by their normalized form (case, whitespace and
+    punctuation ignored).
     """
     db = SessionLocal()
     try:
         since = _get_date_filter(days)
-        results = (
-            db.query(
-                Message.query,
-                func.count(Message.id).label("count"),
-                func.avg(Message.confidence).label("avg_confidence"),
-            )
-            .filter(Message.timestamp >= since)
-            .group_by(Message.query)
-            .order_by(desc("count"))
-            .limit(limit)
-            .all()
-        )
+        results = _ranked_queries(db, since, limit)
 
         questions = []
         for row in results:
             questions.append({
-                "question": row[0],
-                "count": row[1],
-                "avg_confidence": round(row[2], 4) if row[2] else 0,
+                "question": row.query,
+                "count": row.count,
+                "avg_confidence": round(row.avg_confidence, 4) if row.avg_confidence else 0,
             })
 
-        total_messages = (
-            db.query(func.count(Message.id))
-            .filter(Message.timestamp >= since)
-            .scalar()
-        )
+        # Every ranked row carries the period total; no rows means no messages
+        total_messages = results[0].total_messages if results else 0
 
         return {
             "period_days": days,
@@ -82,6 +314,7 @@ def get_top_questions(days: int = 30, limit: int = 20) -> dict:
 # 2. Unanswered Questions (Knowledge Gaps)
 # ═══════════════════════════════════════════════════════════
 
+@_ttl_cached(ANALYTICS_CACHE_TTL)
 def get_unanswered_questions(days: int = 30, limit: int = 20) -> dict:
     """
     Returns questions the bot could not answer (triggered fallback).
@@ -90,43 +323,28 @@ def get_unanswered_questions(days: int = 30, limit: int = 20) -> dict:
     db = SessionLocal()
     try:
         since = _get_date_filter(days)
-        results = (
-            db.query(
-                Message.query,
-                Message.confidence,
+        recent = (
+            select(
+                Message.query.label("question"),
+                _sql_round(db, Message.confidence, 4).label("confidence"),
+                _sql_isoformat(db, Message.timestamp).label("asked_at"),
                 Message.timestamp,
             )
-            .filter(
+            .where(
                 Message.timestamp >= since,
                 Message.is_unanswered == True,
             )
             .order_by(desc(Message.timestamp))
             .limit(limit)
-            .all()
+            .subquery()
         )
-
-        questions = []
-        for row in results:
-            questions.append({
-                "question": row[0],
-                "confidence": round(row[1], 4),
-                "asked_at": row[2].isoformat(),
-            })
-
-        total_unanswered = (
-            db.query(func.count(Message.id))
-            .filter(
-                Message.timestamp >= since,
-                Message.is_unanswered == True,
-            )
-            .scalar()
+        questions = _json_rows(
+            db, recent, ("question", "confidence", "asked_at"),
+            order_by=desc(recent.c.timestamp),
         )
 
-        total_messages = (
-            db.query(func.count(Message.id))
-            .filter(Message.timestamp >= since)
-            .scalar()
-        )
+        totals = _period_totals(db, since)
+        total_unanswered, total_messages = totals.unanswered_count, totals.message_count
 
         unanswered_rate = round(total_unanswered / total_messages * 100, 1) if total_messages > 0 else 0
 
@@ -145,6 +363,7 @@ def get_unanswered_questions(days: int = 30, limit: int = 20) -> dict:
 # 3. Visitor Engagement Trends (Daily/Weekly)
 # ═══════════════════════════════════════════════════════════
 
+@_ttl_cached(ANALYTICS_CACHE_TTL)
 def get_engagement_trends(days: int = 30) -> dict:
     """
     Returns daily message counts and unique session counts
@@ -154,23 +373,39 @@ def get_engagement_trends(days: int = 30) -> dict:
     try:
         since = _get_date_filter(days)
 
-        # Daily message counts
-        daily_messages = (
-            db.query(
-                func.date(Message.timestamp).label("date"),
-                func.count(Message.id).label("message_count"),
-                func.count(func.distinct(Message.session_id)).label("unique_sessions"),
-                func.avg(Message.confidence).label("avg_confidence"),
-                func.avg(Message.latency_seconds).label("avg_latency"),
-            )
-            .filter(Message.timestamp >= since)
-            .group_by(func.date(Message.timestamp))
-            .order_by(func.date(Message.timestamp))
-            .all()
+        day = func.date(Message.timestamp)
+        columns = (
+            func.count(Message.id),
+            func.count(func.distinct(Message.session_id)),
+            func.avg(Message.confidence),
+            func.avg(Message.latency_seconds),
         )
 
+        # Daily rows plus the period total in one statement. The total row is
+        # flagged with is_total = 1; distinct sessions can't be summed from
+        # the daily rows, so the database computes it over the whole period.
+        if db.bind.dialect.name == "postgresql":
+            statement = (
+                select(day, *columns, func.grouping(day).label("is_total"))
+                .where(Message.timestamp >= since)
+                .group_by(func.grouping_sets(tuple_(day), tuple_()))
+            )
+        else:
+            # SQLite has no GROUPING SETS; UNION ALL gives the same rows.
+            statement = union_all(
+                select(day, *columns, literal(0).label("is_total"))
+                .where(Message.timestamp >= since)
+                .group_by(day),
+                select(null(), *columns, literal(1).label("is_total"))
+                .where(Message.timestamp >= since),
+            )
+
         trends = []
-        for row in daily_messages:
+        total_sessions = 0
+        for row in db.execute(statement).all():
+            if row[5]:
+                total_sessions = row[2]
+                continue
             trends.append({
                 "date": row[0] if isinstance(row[0], str) else (row[0].isoformat() if row[0] else None),
                 "message_count": row[1],
@@ -178,14 +413,10 @@ def get_engagement_trends(days: int = 30) -> dict:
                 "avg_confidence": round(row[3], 4) if row[3] else 0,
                 "avg_latency": round(row[4], 3) if row[4] else 0,
             })
+        trends.sort(key=lambda t: t["date"] or "")
 
         # Summary stats
         total_messages = sum(t["message_count"] for t in trends)
-        total_sessions = (
-            db.query(func.count(func.distinct(Message.session_id)))
-            .filter(Message.timestamp >= since)
-            .scalar()
-        )
         avg_messages_per_day = round(total_messages / max(len(trends), 1), 1)
 
         return {
@@ -203,61 +434,50 @@ def get_engagement_trends(days: int = 30) -> dict:
 # 4. AI-Generated Weekly Summary
 # ═══════════════════════════════════════════════════════════
 
-def generate_weekly_summary() -> dict:
+WEEKLY_SUMMARY_MODEL = "gpt-4o-mini"
+# A stored summary older than this is regenerated rather than served
+WEEKLY_SUMMARY_MAX_AGE_DAYS = 7
+
+WEEKLY_SUMMARY_SYSTEM_PROMPT = (
+    "你是一位數據分析師，負責為管理層撰寫每週客服聊天機器人報告。"
+    "請用繁體中文撰寫簡潔、有洞察力的摘要。"
+    "包含以下內容：1) 本週亮點 2) 訪客最關心的話題 "
+    "3) 知識庫缺口（無法回答的問題）4) 改善建議。"
+    "語氣專業但易讀，適合高階主管閱讀，全文約 300 字以內。"
+    "輸入為過去 7 天的 JSON 數據：msgs=總訊息數、sess=獨立訪客數、"
+    "avg_conf=平均信心度、unans=無法回答數、low_conf=低信心度回應數、"
+    "top=最常被問的問題（q=問題、n=次數）、gaps=無法回答的問題。"
+)
+
+
+def collect_weekly_summary_data() -> dict:
     """
-    Uses GPT to generate a management-friendly weekly summary
-    based on conversation data from the past 7 days.
+    Gather the past 7 days of conversation stats and render the compact
+    JSON data summary that is sent to GPT.
+
+    Returns {"stats": {...}, "data_summary": str}.
     """
     db = SessionLocal()
     try:
         since = _get_date_filter(7)
 
-        # Gather stats
-        total_messages = (
-            db.query(func.count(Message.id))
-            .filter(Message.timestamp >= since)
-            .scalar()
+        totals = _period_totals(db, since)
+        total_messages = totals.message_count
+        unanswered_count = totals.unanswered_count
+        low_confidence_count = totals.low_confidence_count
+        avg_confidence = (
+            totals.confidence_sum / total_messages if total_messages else None
         )
-
+        # The rollup has no per-session data; distinct visitors are counted
+        # from raw messages (an index-only scan of idx_msgs_ts_session)
         total_sessions = (
             db.query(func.count(func.distinct(Message.session_id)))
             .filter(Message.timestamp >= since)
             .scalar()
         )
 
-        unanswered_count = (
-            db.query(func.count(Message.id))
-            .filter(
-                Message.timestamp >= since,
-                Message.is_unanswered == True,
-            )
-            .scalar()
-        )
-
-        low_confidence_count = (
-            db.query(func.count(Message.id))
-            .filter(
-                Message.timestamp >= since,
-                Message.is_low_confidence == True,
-            )
-            .scalar()
-        )
-
-        avg_confidence = (
-            db.query(func.avg(Message.confidence))
-            .filter(Message.timestamp >= since)
-            .scalar()
-        )
-
         # Top questions
-        top_questions = (
-            db.query(Message.query, func.count(Message.id).label("cnt"))
-            .filter(Message.timestamp >= since)
-            .group_by(Message.query)
-            .order_by(desc("cnt"))
-            .limit(10)
-            .all()
-        )
+        top_questions = _ranked_queries(db, since, 10)
 
         # Unanswered questions
         unanswered = (
@@ -270,48 +490,18 @@ def generate_weekly_summary() -> dict:
             .all()
         )
 
-        # Build data summary for GPT
-        data_summary = f"""
-過去 7 天的客服聊天機器人數據摘要：
-
-總訊息數：{total_messages}
-總訪客數（獨立會話）：{total_sessions}
-平均信心度：{round(avg_confidence, 2) if avg_confidence else 'N/A'}
-無法回答的問題數：{unanswered_count}
-低信心度回應數：{low_confidence_count}
-
-最常被問到的問題（前10名）：
-{chr(10).join([f'  {i+1}. "{q[0]}" ({q[1]} 次)' for i, q in enumerate(top_questions)])}
-
-無法回答的問題：
-{chr(10).join([f'  - "{q[0]}"' for q in unanswered]) if unanswered else '  （無）'}
-"""
-
-        # Generate summary via GPT
-        response = openai_client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        "你是一位數據分析師，負責為管理層撰寫每週客服聊天機器人報告。"
-                        "請用繁體中文撰寫簡潔、有洞察力的摘要。"
-                        "包含以下內容：1) 本週亮點 2) 訪客最關心的話題 "
-                        "3) 知識庫缺口（無法回答的問題）4) 改善建議。"
-                        "語氣專業但易讀，適合高階主管閱讀。"
-                    ),
-                },
-                {"role": "user", "content": data_summary},
-            ],
-            temperature=0.4,
-            max_tokens=1000,
-        )
-
-        summary_text = response.choices[0].message.content
+        # Compact JSON keeps the prompt short; the system prompt explains the keys
+        data_summary = orjson.dumps({
+            "msgs": total_messages,
+            "sess": total_sessions,
+            "avg_conf": round(avg_confidence, 2) if avg_confidence else None,
+            "unans": unanswered_count,
+            "low_conf": low_confidence_count,
+            "top": [{"q": row.query, "n": row.count} for row in top_questions],
+            "gaps": [q for (q,) in unanswered],
+        }).decode()
 
         return {
-            "period": "past_7_days",
-            "generated_at": datetime.now(timezone.utc).isoformat(),
             "stats": {
                 "total_messages": total_messages,
                 "total_sessions": total_sessions,
@@ -319,16 +509,87 @@ def generate_weekly_summary() -> dict:
                 "unanswered_count": unanswered_count,
                 "low_confidence_count": low_confidence_count,
             },
-            "summary": summary_text,
+            "data_summary": data_summary,
         }
     finally:
         db.close()
 
 
+def build_weekly_summary_request(data_summary: str) -> dict:
+    """Chat-completion request body for the weekly summary (sync or batch)."""
+    return {
+        "model": WEEKLY_SUMMARY_MODEL,
+        "messages": [
+            {"role": "system", "content": WEEKLY_SUMMARY_SYSTEM_PROMPT},
+            {"role": "user", "content": data_summary},
+        ],
+        "temperature": 0.4,
+        "max_tokens": 400,
+    }
+
+
+def save_weekly_summary(stats: dict, summary_text: str) -> dict:
+    """Store a generated summary as today's row and return its payload."""
+    now = datetime.now(timezone.utc)
+    payload = {
+        "period": "past_7_days",
+        "generated_at": now.isoformat(),
+        "stats": stats,
+        "summary": summary_text,
+    }
+
+    db = SessionLocal()
+    try:
+        db.merge(WeeklySummary(date=now.date(), payload=payload))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    return payload
+
+
+def generate_weekly_summary(force: bool = False) -> dict:
+    """
+    Returns the latest management-friendly weekly summary.
+
+    Summaries are produced off the request path by the weekly Batch API
+    job (app/weekly_summary.py). Only when none exists yet, the latest is
+    more than WEEKLY_SUMMARY_MAX_AGE_DAYS old (the job stopped running), or
+    `force` is set is one generated synchronously here.
+    """
+    if not force:
+        db = SessionLocal()
+        try:
+            latest = (
+                db.query(WeeklySummary.date, WeeklySummary.payload)
+                .order_by(desc(WeeklySummary.date))
+                .first()
+            )
+        finally:
+            db.close()
+        if latest:
+            age_days = (datetime.now(timezone.utc).date() - latest.date).days
+            if age_days <= WEEKLY_SUMMARY_MAX_AGE_DAYS:
+                return latest.payload
+            logger.warning(
+                f"Latest weekly summary is {age_days} days old; regenerating"
+            )
+
+    data = collect_weekly_summary_data()
+    response = openai_client.chat.completions.create(
+        **build_weekly_summary_request(data["data_summary"])
+    )
+    return save_weekly_summary(data["stats"], response.choices[0].message.content)
+
+
 # ═══════════════════════════════════════════════════════════
 # 5. Category Breakdown
 # ═══════════════════════════════════════════════════════════
 
+@_ttl_cached(ANALYTICS_CACHE_TTL)
 def get_category_breakdown(days: int = 30) -> dict:
     """
     Breaks down queries by the categories of their matched sources.
@@ -337,24 +598,37 @@ def get_category_breakdown(days: int = 30) -> dict:
     db = SessionLocal()
     try:
         since = _get_date_filter(days)
-        messages = (
-            db.query(Message.sources)
-            .filter(Message.timestamp >= since)
-            .all()
-        )
+        rollup_filter, raw_filter = _split_period(db, since, CategoryDailyRollup.date)
+        sources, category = source_categories(db)
+
+        # Unnest + group in the database rather than shipping every
+        # sources array to Python
+        parts = [
+            select(category.label("category"), func.count().label("match_count"))
+            .select_from(Message)
+            .join(sources, true())
+            .where(raw_filter, category.is_not(None), category != "")
+            .group_by(category)
+        ]
+        if rollup_filter is not None:
+            parts.append(
+                select(CategoryDailyRollup.category, CategoryDailyRollup.match_count)
+                .where(rollup_filter)
+            )
+        counts = union_all(*parts).subquery()
 
-        category_counts = Counter()
-        for row in messages:
-            sources = row[0] if row[0] else []
-            for source in sources:
-                category = source.get("category", "")
-                if category:
-                    category_counts[category] += 1
+        results = db.execute(
+            select(
+                counts.c.category,
+                cast(func.sum(counts.c.match_count), Integer).label("count"),
+            )
+            .group_by(counts.c.category)
+            .order_by(desc("count"))
+        ).all()
 
-        # Sort by count
         categories = [
             {"category": cat, "count": count}
-            for cat, count in category_counts.most_common()
+            for cat, count in results
         ]
 
         total = sum(c["count"] for c in categories)
@@ -374,6 +648,7 @@ def get_category_breakdown(days: int = 30) -> dict:
 # 6. Low Confidence Responses
 # ═══════════════════════════════════════════════════════════
 
+@_ttl_cached(ANALYTICS_CACHE_TTL)
 def get_low_confidence_responses(days: int = 30, limit: int = 20) -> dict:
     """
     Returns responses where the bot had low confidence.
@@ -382,49 +657,47 @@ def get_low_confidence_responses(days: int = 30, limit: int = 20) -> dict:
     db = SessionLocal()
     try:
         since = _get_date_filter(days)
-        results = (
-            db.query(
-                Message.query,
-                Message.answer,
-                Message.confidence,
-                Message.matches_found,
-                Message.timestamp,
-                Message.sources,
+        # Truncate the answer, pick the top source and build the JSON in
+        # SQL, so full answers and source arrays never leave the database
+        answer_preview = case(
+            (
+                func.length(Message.answer) > 200,
+                func.substr(Message.answer, 1, 200, type_=Text).concat("..."),
+            ),
+            else_=Message.answer,
+        )
+        top_source = (
+            Message.sources[0]
+            if db.bind.dialect.name == "postgresql"
+            else func.json_extract(Message.sources, "$[0]")
+        )
+        lowest = (
+            select(
+                Message.query.label("question"),
+                answer_preview.label("answer"),
+                _sql_round(db, Message.confidence, 4).label("confidence"),
+                Message.matches_found.label("matches_found"),
+                _sql_isoformat(db, Message.timestamp).label("asked_at"),
+                top_source.label("top_source"),
+                Message.confidence.label("sort_key"),
             )
-            .filter(
+            .where(
                 Message.timestamp >= since,
                 Message.is_low_confidence == True,
             )
             .order_by(Message.confidence)
             .limit(limit)
-            .all()
+            .subquery()
         )
-
-        responses = []
-        for row in results:
-            responses.append({
-                "question": row[0],
-                "answer": row[1][:200] + "..." if len(row[1]) > 200 else row[1],
-                "confidence": round(row[2], 4),
-                "matches_found": row[3],
-                "asked_at": row[4].isoformat(),
-                "top_source": row[5][0] if row[5] else None,
-            })
-
-        total_low = (
-            db.query(func.count(Message.id))
-            .filter(
-                Message.timestamp >= since,
-                Message.is_low_confidence == True,
-            )
-            .scalar()
+        responses = _json_rows(
+            db, lowest,
+            ("question", "answer", "confidence", "matches_found", "asked_at", "top_source"),
+            order_by=lowest.c.sort_key,
+            json_keys=("top_source",),
         )
 
-        total_messages = (
-            db.query(func.count(Message.id))
-            .filter(Message.timestamp >= since)
-            .scalar()
-        )
+        totals = _period_totals(db, since)
+        total_low, total_messages = totals.low_confidence_count, totals.message_count
 
         low_rate = round(total_low / total_messages * 100, 1) if total_messages > 0 else 0
 
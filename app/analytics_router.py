@@ -4,6 +4,10 @@ Analytics API Router.
 Separate router for management-facing analytics endpoints.
 All endpoints require API key authentication.
 
+The analytics queries use sync SQLAlchemy sessions, so report endpoints are
+plain `def` handlers — FastAPI runs them on its threadpool instead of
+blocking the event loop.
+
 Endpoints:
     GET /api/analytics/top-questions
     GET /api/analytics/unanswered
@@ -14,10 +18,12 @@ Endpoints:
     GET /api/analytics/overview
 """
 
+import asyncio
 import logging
 from typing import Optional
 
 from fastapi import APIRouter, HTTPException, Query, Depends, Security
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import APIKeyHeader
 
 from app.config import ANALYTICS_API_KEY
@@ -52,13 +58,14 @@ async def verify_analytics_key(api_key: str = Security(api_key_header)):
 # ═══════════════════════════════════════════════════════════
 
 @router.get("/top-questions")
-async def top_questions(
+def top_questions(
     days: int = Query(default=30, ge=1, le=365),
     limit: int = Query(default=20, ge=1, le=100),
+    force: bool = Query(default=False, description="Bypass the result cache"),
     _auth: bool = Depends(verify_analytics_key),
 ):
     """Top questions ranked by frequency."""
-    return get_top_questions(days=days, limit=limit)
+    return get_top_questions(days=days, limit=limit, force=force)
 
 
 # ═══════════════════════════════════════════════════════════
@@ -66,13 +73,14 @@ async def top_questions(
 # ═══════════════════════════════════════════════════════════
 
 @router.get("/unanswered")
-async def unanswered(
+def unanswered(
     days: int = Query(default=30, ge=1, le=365),
     limit: int = Query(default=20, ge=1, le=100),
+    force: bool = Query(default=False, description="Bypass the result cache"),
     _auth: bool = Depends(verify_analytics_key),
 ):
     """Questions the bot could not answer — knowledge base gaps."""
-    return get_unanswered_questions(days=days, limit=limit)
+    return get_unanswered_questions(days=days, limit=limit, force=force)
 
 
 # ═══════════════════════════════════════════════════════════
@@ -80,12 +88,13 @@ async def unanswered(
 # ═══════════════════════════════════════════════════════════
 
 @router.get("/trends")
-async def trends(
+def trends(
     days: int = Query(default=30, ge=1, le=365),
+    force: bool = Query(default=False, description="Bypass the result cache"),
     _auth: bool = Depends(verify_analytics_key),
 ):
     """Daily message counts, unique sessions, and performance metrics."""
-    return get_engagement_trends(days=days)
+    return get_engagement_trends(days=days, force=force)
 
 
 # ═══════════════════════════════════════════════════════════
@@ -93,11 +102,12 @@ async def trends(
 # ═══════════════════════════════════════════════════════════
 
 @router.get("/weekly-summary")
-async def weekly_summary(
+def weekly_summary(
+    force: bool = Query(default=False, description="Bypass the result cache"),
     _auth: bool = Depends(verify_analytics_key),
 ):
     """AI-generated management summary of the past 7 days."""
-    return generate_weekly_summary()
+    return generate_weekly_summary(force=force)
 
 
 # ═══════════════════════════════════════════════════════════
@@ -105,12 +115,13 @@ async def weekly_summary(
 # ═══════════════════════════════════════════════════════════
 
 @router.get("/categories")
-async def categories(
+def categories(
     days: int = Query(default=30, ge=1, le=365),
+    force: bool = Query(default=False, description="Bypass the result cache"),
     _auth: bool = Depends(verify_analytics_key),
 ):
     """Query volume broken down by topic category."""
-    return get_category_breakdown(days=days)
+    return get_category_breakdown(days=days, force=force)
 
 
 # ═══════════════════════════════════════════════════════════
@@ -118,13 +129,14 @@ async def categories(
 # ═══════════════════════════════════════════════════════════
 
 @router.get("/low-confidence")
-async def low_confidence(
+def low_confidence(
     days: int = Query(default=30, ge=1, le=365),
     limit: int = Query(default=20, ge=1, le=100),
+    force: bool = Query(default=False, description="Bypass the result cache"),
     _auth: bool = Depends(verify_analytics_key),
 ):
     """Responses where the bot had low confidence — needs KB improvement."""
-    return get_low_confidence_responses(days=days, limit=limit)
+    return get_low_confidence_responses(days=days, limit=limit, force=force)
 
 
 # ═══════════════════════════════════════════════════════════
@@ -134,14 +146,19 @@ async def low_confidence(
 @router.get("/overview")
 async def overview(
     days: int = Query(default=30, ge=1, le=365),
+    force: bool = Query(default=False, description="Bypass the result cache"),
     _auth: bool = Depends(verify_analytics_key),
 ):
     """Combined overview of all key analytics metrics."""
-    top = get_top_questions(days=days, limit=5)
-    gaps = get_unanswered_questions(days=days, limit=5)
-    engagement = get_engagement_trends(days=days)
-    cats = get_category_breakdown(days=days)
-    low = get_low_confidence_responses(days=days, limit=5)
+    # Each query opens its own session, so they can run side by side on the
+    # threadpool (and connection pool) instead of one after another.
+    top, gaps, engagement, cats, low = await asyncio.gather(
+        run_in_threadpool(get_top_questions, days=days, limit=5, force=force),
+        run_in_threadpool(get_unanswered_questions, days=days, limit=5, force=force),
+        run_in_threadpool(get_engagement_trends, days=days, force=force),
+        run_in_threadpool(get_category_breakdown, days=days, force=force),
+        run_in_threadpool(get_low_confidence_responses, days=days, limit=5, force=force),
+    )
 
     return {
         "period_days": days,
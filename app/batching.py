@@ -0,0 +1,58 @@
+"""
+Asyncio micro-batching.
+
+Shared by the embedding batcher (app/chat.py) and the interaction log
+writer (app/logger.py): callers put items on a queue, and one worker task
+drains it in batches.
+"""
+
+import asyncio
+
+
+class QueueBatcher:
+    """
+    Collects queued items into batches of up to `max_batch_size`, gathered
+    for at most `window_seconds` after the first arrives, and hands each
+    batch to `_handle_batch`. The queue and worker are created on first use
+    in the running event loop (and again if the loop changes or the worker
+    died).
+    """
+
+    def __init__(self, max_batch_size, window_seconds, max_queue_size=0):
+        self.max_batch_size = max_batch_size
+        self.window_seconds = window_seconds
+        self.max_queue_size = max_queue_size
+        self._queue = None
+        self._worker = None
+        self._loop = None
+
+    async def _put(self, item):
+        self._ensure_worker()
+        await self._queue.put(item)
+
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+            self._worker = loop.create_task(self._run())
+
+    async def _next_batch(self):
+        batch = [await self._queue.get()]
+        deadline = self._loop.time() + self.window_seconds
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - self._loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            await self._handle_batch(await self._next_batch())
+
+    async def _handle_batch(self, batch):
+        raise NotImplementedError
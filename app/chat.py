@@ -3,25 +3,40 @@ Company Q&A Chat Engine.
 
 Optimized with:
 - Query caching (LRU, 1hr TTL)
+- Async OpenAI client over a pooled HTTP/2 connection (non-blocking I/O)
+- Query embedding caching (LRU, optionally int8) and micro-batching of concurrent embeds
+- Retrieval caching keyed by query text (LRU, 5min TTL)
+- Semantic response caching (cosine >= 0.95 to a recent query, 1hr TTL)
 - Streaming responses (SSE)
 - TOP_K=3 with 0.4 threshold for better accuracy
+- Direct answers (no LLM call) when the top match is a near-exact hit
 - 500 max tokens for concise answers
 """
 
+import asyncio
 import hashlib
-import json
 import logging
+import os
+import pickle
 import time
+from array import array
 from typing import List, Dict, Optional
-from collections import OrderedDict
 
-from openai import OpenAI
-from pinecone import Pinecone
+import httpx
+import numpy as np
+import orjson
+from openai import AsyncOpenAI
+from pinecone.grpc import PineconeGRPC
 
+from app.analytics import get_top_questions
+from app.batching import QueueBatcher
 from app.config import (
     OPENAI_API_KEY,
     EMBEDDING_MODEL,
     CHAT_MODEL,
+    DIRECT_ANSWER_THRESHOLD,
+    USE_INT8_EMBEDDINGS,
+    EMBEDDING_CACHE_PATH,
     PINECONE_API_KEY,
     PINECONE_INDEX_NAME,
     COMPANY_QA_NAMESPACE,
@@ -29,8 +44,18 @@ from app.config import (
 
 logger = logging.getLogger(__name__)
 
-openai_client = OpenAI(api_key=OPENAI_API_KEY)
-pc = Pinecone(api_key=PINECONE_API_KEY)
+# Async client with a shared keep-alive pool, so OpenAI calls don't block
+# the event loop and concurrent requests reuse connections.
+openai_client = AsyncOpenAI(
+    api_key=OPENAI_API_KEY,
+    http_client=httpx.AsyncClient(
+        http2=True,
+        timeout=60.0,
+        limits=httpx.Limits(max_connections=200, max_keepalive_connections=50),
+    ),
+)
+# gRPC transport: protobuf payloads over one persistent HTTP/2 channel
+pc = PineconeGRPC(api_key=PINECONE_API_KEY)
 index = pc.Index(PINECONE_INDEX_NAME)
 
 # ── Optimized retrieval config ──
@@ -38,44 +63,128 @@ TOP_K = 3
 SIMILARITY_THRESHOLD = 0.4
 MAX_TOKENS = 500
 
+# Logged as the model for answers served straight from the knowledge base
+DIRECT_ANSWER_MODEL = "direct-answer"
+
 
 # ═══════════════════════════════════════════════════════════
 # Query Cache (LRU, in-memory)
 # ═══════════════════════════════════════════════════════════
 
 class QueryCache:
+    log_hits = True
+
     def __init__(self, max_size=200, ttl_seconds=3600):
         self.max_size = max_size
         self.ttl = ttl_seconds
-        self._cache = OrderedDict()
+        # Plain dicts keep insertion order, so the first key is the least
+        # recently used; a hit is moved to the end by re-inserting it
+        self._cache = {}
+
+    def make_key(self, query):
+        """Hash a query once; reuse the key for get_by_key / put_by_key."""
+        return self._hash(query.strip().lower())
 
-    def _key(self, query):
-        return hashlib.md5(query.strip().lower().encode()).hexdigest()
+    @staticmethod
+    def _hash(text):
+        return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
 
     def get(self, query):
-        key = self._key(query)
-        if key in self._cache:
-            entry = self._cache[key]
-            if time.time() - entry["timestamp"] < self.ttl:
-                self._cache.move_to_end(key)
-                logger.info(f"Cache HIT for query: '{query[:40]}...'")
-                return entry["result"]
-            else:
-                del self._cache[key]
-        return None
+        return self.get_by_key(self.make_key(query))
 
     def put(self, query, result):
-        key = self._key(query)
+        self.put_by_key(self.make_key(query), result)
+
+    def get_by_key(self, key):
+        entry = self._cache.pop(key, None)
+        if entry is not None and time.time() - entry["timestamp"] < self.ttl:
+            self._cache[key] = entry
+            if self.log_hits:
+                logger.info(f"Cache HIT for key {key[:12]}")
+            return entry["result"]
+        return None
+
+    def put_by_key(self, key, result):
+        self._cache.pop(key, None)
         if len(self._cache) >= self.max_size:
-            self._cache.popitem(last=False)
+            self._cache.pop(next(iter(self._cache)))
         self._cache[key] = {"result": result, "timestamp": time.time()}
 
     def clear(self):
         self._cache.clear()
-        logger.info("Query cache cleared")
+        logger.info(f"{type(self).__name__} cleared")
+
+
+class RetrievalCache(QueryCache):
+    """
+    Short-lived cache of Pinecone matches keyed by the query text (keyed
+    like the embedding cache, so case-sensitive) plus the search
+    parameters. Equal keys mean the same embedding and so the same search;
+    a hit skips both the embedding lookup and the vector search.
+    """
+    log_hits = False
+
+    def make_key(self, query):
+        return self._hash(f"{COMPANY_QA_NAMESPACE}|{TOP_K}|{query.strip()}")
+
+
+class SemanticCache:
+    """
+    Recently answered queries indexed by unit-normalized embedding. A query
+    whose embedding has cosine similarity >= `threshold` with a cached one
+    reuses that answer, skipping retrieval and generation entirely — this
+    catches paraphrases the exact-match QueryCache misses.
+
+    Entries live in a fixed-size matrix used as a ring buffer (oldest entry
+    is overwritten first); lookups are a single matrix-vector product.
+    """
+
+    def __init__(self, max_size=500, ttl_seconds=3600, threshold=0.95):
+        self.max_size = max_size
+        self.ttl = ttl_seconds
+        self.threshold = threshold
+        self.clear()
+
+    @staticmethod
+    def _normalize(embedding):
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def get(self, embedding):
+        if not self._size:
+            return None
+        vector = self._normalize(embedding)
+        scores = self._vectors[:self._size] @ vector
+        scores[self._timestamps[:self._size] < time.time() - self.ttl] = -1.0
+        best = int(np.argmax(scores))
+        if scores[best] >= self.threshold:
+            logger.info(f"Semantic cache HIT (similarity {scores[best]:.3f})")
+            return self._results[best]
+        return None
+
+    def put(self, embedding, result):
+        vector = self._normalize(embedding)
+        if self._vectors is None:
+            self._vectors = np.zeros((self.max_size, vector.shape[0]), dtype=np.float32)
+        slot = self._next
+        self._vectors[slot] = vector
+        self._timestamps[slot] = time.time()
+        self._results[slot] = result
+        self._next = (slot + 1) % self.max_size
+        self._size = min(self._size + 1, self.max_size)
+
+    def clear(self):
+        self._vectors = None
+        self._timestamps = np.zeros(self.max_size)
+        self._results = [None] * self.max_size
+        self._next = 0
+        self._size = 0
 
 
 cache = QueryCache(max_size=200, ttl_seconds=3600)
+retrieval_cache = RetrievalCache(max_size=500, ttl_seconds=300)
+semantic_cache = SemanticCache(max_size=500, ttl_seconds=3600, threshold=0.95)
 
 
 SYSTEM_PROMPT = """你是一位親切專業的客服助理，負責回答訪客關於公司服務的問題。
@@ -99,44 +208,225 @@ SYSTEM_PROMPT = """你是一位親切專業的客服助理，負責回答訪客
 - 如果不確定，寧可引導訪客聯繫客服"""
 
 
-def embed_query(query):
-    response = openai_client.embeddings.create(model=EMBEDDING_MODEL, input=[query])
-    return response.data[0].embedding
+# ═══════════════════════════════════════════════════════════
+# Query Embeddings (LRU-cached, micro-batched)
+# ═══════════════════════════════════════════════════════════
+
+EMBEDDING_CACHE_SIZE = 10000
+EMBEDDING_CACHE_TTL_SECONDS = 24 * 3600
+EMBED_BATCH_MAX_SIZE = 32
+EMBED_BATCH_WINDOW_SECONDS = 0.02
+
+
+class EmbeddingBatcher(QueueBatcher):
+    """
+    Coalesces embedding requests from concurrent callers into one
+    `embeddings.create` call. A worker task collects queries for up to
+    `window_seconds` (or `max_batch_size` queries), embeds them together
+    while it starts collecting the next batch, and resolves each caller's
+    future with its own vector.
+    """
+
+    def __init__(self, max_batch_size=32, window_seconds=0.02):
+        super().__init__(max_batch_size, window_seconds)
+        self._in_flight = set()
+
+    async def embed(self, text):
+        future = asyncio.get_running_loop().create_future()
+        await self._put((text, future))
+        return await future
+
+    async def _handle_batch(self, batch):
+        # Each batch is embedded in its own task, so the next batch keeps
+        # collecting while earlier ones are still waiting on OpenAI.
+        task = self._loop.create_task(self._embed_batch(batch))
+        self._in_flight.add(task)
+        task.add_done_callback(self._in_flight.discard)
+
+    async def _embed_batch(self, batch):
+        # Concurrent callers often ask the same thing; embed each text once
+        texts = list(dict.fromkeys(text for text, _ in batch))
+        try:
+            response = await openai_client.embeddings.create(
+                model=EMBEDDING_MODEL, input=texts
+            )
+            vectors = {text: item.embedding for text, item in zip(texts, response.data)}
+            for text, future in batch:
+                if not future.done():
+                    future.set_result(vectors[text])
+            if len(batch) > 1:
+                logger.info(f"Embedded {len(batch)} queries ({len(texts)} unique) in one batch")
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+
+
+batcher = EmbeddingBatcher(
+    max_batch_size=EMBED_BATCH_MAX_SIZE, window_seconds=EMBED_BATCH_WINDOW_SECONDS
+)
+
+
+
+class EmbeddingCache(QueryCache):
+    """
+    Query embeddings keyed by the stripped query text, stored compactly
+    (float32 array or int8 codes; ~6 KB or less instead of ~50 KB for a
+    list). Embeddings don't depend on the index, so this survives reindexes
+    and can be saved across restarts.
+    """
+    log_hits = False
+
+    def make_key(self, query):
+        # Case is kept: it is part of what gets embedded
+        return self._hash(query.strip())
+
+    def save(self, path):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(self._cache, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        logger.info(f"Saved {len(self._cache)} cached embeddings to {path}")
+
+    def load(self, path):
+        if not os.path.exists(path):
+            return
+        try:
+            with open(path, "rb") as f:
+                self._cache = dict(pickle.load(f))
+        except Exception as e:
+            logger.warning(f"Could not load embedding cache from {path}: {e}")
+            return
+        while len(self._cache) > self.max_size:
+            self._cache.pop(next(iter(self._cache)))
+        logger.info(f"Loaded {len(self._cache)} cached embeddings from {path}")
+
+
+embedding_cache = EmbeddingCache(
+    max_size=EMBEDDING_CACHE_SIZE, ttl_seconds=EMBEDDING_CACHE_TTL_SECONDS
+)
+
+
+def _quantize_embedding(embedding):
+    """Pack an embedding as int8 codes plus the scale that restores it."""
+    vector = np.asarray(embedding, dtype=np.float32)
+    scale = float(np.abs(vector).max()) / 127 or 1.0
+    return (vector / scale).round().astype(np.int8), scale
+
+
+def _dequantize_embedding(packed):
+    """Restore a packed embedding, re-normalized so cosine scores hold."""
+    codes, scale = packed
+    vector = codes.astype(np.float32) * scale
+    norm = np.linalg.norm(vector)
+    return (vector / norm if norm else vector).tolist()
+
+
+async def embed_query(query):
+    # Case can carry meaning (product names, acronyms), so the text is
+    # embedded as typed and cached under that same text, never lowercased
+    cache_key = embedding_cache.make_key(query)
+    cached = embedding_cache.get_by_key(cache_key)
+    if cached is not None:
+        if isinstance(cached, tuple):
+            return _dequantize_embedding(cached)
+        return list(cached)
+
+    embedding = await batcher.embed(query.strip())
+    if USE_INT8_EMBEDDINGS:
+        embedding_cache.put_by_key(cache_key, _quantize_embedding(embedding))
+    else:
+        embedding_cache.put_by_key(cache_key, array("f", embedding))
+    return embedding
+
+
+def load_embedding_cache():
+    if EMBEDDING_CACHE_PATH:
+        embedding_cache.load(EMBEDDING_CACHE_PATH)
+
+
+def save_embedding_cache():
+    if EMBEDDING_CACHE_PATH:
+        embedding_cache.save(EMBEDDING_CACHE_PATH)
+
+
+# Below this many matches a plain loop beats building a numpy array
+VECTORIZED_FILTER_MIN_MATCHES = 16
+
 
+def _filter_matches(raw_matches):
+    """Keep matches scoring at least SIMILARITY_THRESHOLD, in rank order."""
+    if len(raw_matches) < VECTORIZED_FILTER_MIN_MATCHES:
+        kept = [match for match in raw_matches if match["score"] >= SIMILARITY_THRESHOLD]
+    else:
+        # Large TOP_K (e.g., feeding a reranker): one vectorized compare
+        scores = np.fromiter(
+            (match["score"] for match in raw_matches),
+            dtype=np.float64, count=len(raw_matches),
+        )
+        kept = [raw_matches[i] for i in np.flatnonzero(scores >= SIMILARITY_THRESHOLD)]
+    return [
+        {"score": round(match["score"], 4), "metadata": match["metadata"]}
+        for match in kept
+    ]
 
-def retrieve_context(query):
-    query_embedding = embed_query(query)
-    results = index.query(
+
+async def retrieve_context(query):
+    cache_key = retrieval_cache.make_key(query)
+    matches = retrieval_cache.get_by_key(cache_key)
+    if matches is not None:
+        return matches
+
+    query_embedding = await embed_query(query)
+
+    # The Pinecone client is synchronous — run it off the event loop
+    results = await asyncio.to_thread(
+        index.query,
         vector=query_embedding, top_k=TOP_K,
-        include_metadata=True, namespace=COMPANY_QA_NAMESPACE,
+        include_metadata=True, include_values=False, namespace=COMPANY_QA_NAMESPACE,
     )
-    matches = []
-    for match in results.get("matches", []):
-        if match["score"] >= SIMILARITY_THRESHOLD:
-            matches.append({"score": round(match["score"], 4), "metadata": match["metadata"]})
+    matches = _filter_matches(results.get("matches", []))
+    retrieval_cache.put_by_key(cache_key, matches)
     logger.info(f"Retrieved {len(matches)} matches for query: '{query[:50]}...'")
     return matches
 
 
+async def retrieve_contexts(queries):
+    """
+    Retrieve matches for several queries at once (e.g., prewarming).
+
+    The embeddings are requested together, so the batcher sends them in one
+    API call; Pinecone has no multi-vector query, so the index queries run
+    concurrently instead. Returns one match list per query, in order.
+    """
+    return await asyncio.gather(*(retrieve_context(query) for query in queries))
+
+
 def build_context_block(matches):
     if not matches:
         return "（找不到相關的參考資料）"
     blocks = []
     for i, match in enumerate(matches, 1):
         meta = match["metadata"]
-        block = f"【參考資料 {i}】（相關度：{match['score']}）\n"
-        block += f"問題：{meta.get('question', '')}\n"
-        block += f"答案：{meta.get('answer', '')}"
+        parts = [
+            f"【參考資料 {i}】（相關度：{match['score']}）",
+            f"問題：{meta.get('question', '')}",
+            f"答案：{meta.get('answer', '')}",
+        ]
         if meta.get("link"):
-            block += f"\n連結：{meta['link']}"
+            parts.append(f"連結：{meta['link']}")
         if meta.get("category"):
-            block += f"\n分類：{meta['category']}"
-        blocks.append(block)
+            parts.append(f"分類：{meta['category']}")
+        blocks.append("\n".join(parts))
     return "\n\n".join(blocks)
 
 
+# Identical for every request; built once and shared (never mutated)
+SYSTEM_MESSAGE = {"role": "system", "content": SYSTEM_PROMPT}
+
+
 def _build_messages(query, context_block, conversation_history=None):
-    messages = [{"role": "system", "content": SYSTEM_PROMPT}]
+    messages = [SYSTEM_MESSAGE]
     if conversation_history:
         messages.extend(conversation_history)
     user_message = f"""訪客問題：{query}
@@ -157,11 +447,30 @@ def _calc_confidence(matches):
     return 0.0
 
 
+def _direct_answer(matches):
+    """
+    Return the stored answer when the top match is a near-exact hit
+    (score >= DIRECT_ANSWER_THRESHOLD), otherwise None. Paraphrasing a
+    canonical answer through the LLM only adds latency and cost.
+    """
+    if not matches or matches[0]["score"] < DIRECT_ANSWER_THRESHOLD:
+        return None
+    meta = matches[0]["metadata"]
+    answer = meta.get("answer", "").strip()
+    if not answer:
+        return None
+    if meta.get("link"):
+        answer += f"\n\n您可以在這裡查看詳情：{meta['link']}"
+    return answer
+
+
 def _build_sources(matches):
     sources = []
     for match in matches:
+        # gRPC returns metadata numbers as floats (12.0); rows are ints
+        row_number = match["metadata"].get("row_number")
         source = {
-            "row_number": match["metadata"].get("row_number"),
+            "row_number": int(row_number) if row_number is not None else None,
             "question": match["metadata"].get("question"),
             "relevance_score": match["score"],
         }
@@ -177,42 +486,67 @@ def _build_sources(matches):
 # Standard (non-streaming) chat
 # ═══════════════════════════════════════════════════════════
 
-def chat(query, conversation_history=None):
+async def chat(query, conversation_history=None):
     start_time = time.time()
 
-    # Check cache
-    cached = cache.get(query)
-    if cached and not conversation_history:
-        cached["latency_seconds"] = round(time.time() - start_time, 3)
-        cached["cached"] = True
-        return cached
+    # Check cache (the key is computed once and reused for the put below)
+    cache_key = None if conversation_history else cache.make_key(query)
+    cached = cache.get_by_key(cache_key) if cache_key else None
+    if cached:
+        return {
+            **cached.result,
+            "latency_seconds": round(time.time() - start_time, 3),
+            "cached": True,
+        }
+
+    # Check semantic cache (paraphrases of recently answered queries)
+    if not conversation_history:
+        query_embedding = await embed_query(query)
+        similar = semantic_cache.get(query_embedding)
+        if similar:
+            return {
+                **similar.result,
+                "latency_seconds": round(time.time() - start_time, 3),
+                "cached": True,
+            }
 
     # Retrieve and generate
-    matches = retrieve_context(query)
-    context_block = build_context_block(matches)
-    messages = _build_messages(query, context_block, conversation_history)
+    matches = await retrieve_context(query)
+    answer = _direct_answer(matches)
 
-    response = openai_client.chat.completions.create(
-        model=CHAT_MODEL, messages=messages,
-        temperature=0.3, max_tokens=MAX_TOKENS,
-    )
+    if answer:
+        confidence = matches[0]["score"]
+        model = DIRECT_ANSWER_MODEL
+    else:
+        context_block = build_context_block(matches)
+        messages = _build_messages(query, context_block, conversation_history)
+
+        response = await openai_client.chat.completions.create(
+            model=CHAT_MODEL, messages=messages,
+            temperature=0.3, max_tokens=MAX_TOKENS,
+        )
+
+        answer = response.choices[0].message.content
+        confidence = _calc_confidence(matches)
+        model = CHAT_MODEL
 
-    answer = response.choices[0].message.content
     elapsed = round(time.time() - start_time, 3)
 
     result = {
         "answer": answer,
         "sources": _build_sources(matches),
-        "confidence": _calc_confidence(matches),
+        "confidence": confidence,
         "latency_seconds": elapsed,
-        "model": CHAT_MODEL,
+        "model": model,
         "matches_found": len(matches),
     }
 
     logger.info(f"Chat response — confidence: {result['confidence']}, latency: {elapsed}s")
 
     if not conversation_history:
-        cache.put(query, result)
+        entry = _CachedAnswer(result)
+        cache.put_by_key(cache_key, entry)
+        semantic_cache.put(query_embedding, entry)
 
     return result
 
@@ -221,55 +555,174 @@ def chat(query, conversation_history=None):
 # Streaming chat (SSE)
 # ═══════════════════════════════════════════════════════════
 
-def chat_stream(query, conversation_history=None):
+# Chunk frames are the hot path (one per token): only the text is encoded,
+# the rest of the frame is constant
+_CHUNK_FRAME_PREFIX = b'data: {"type":"chunk","content":'
+_CHUNK_FRAME_SUFFIX = b"}\n\n"
+
+# Token deltas are buffered and sent once this many characters or seconds
+# have accumulated, instead of one frame per 1-3 character token
+STREAM_FLUSH_CHARS = 64
+STREAM_FLUSH_SECONDS = 0.03
+
+
+def _sse_event(payload: dict) -> bytes:
+    return b"data: " + orjson.dumps(payload) + b"\n\n"
+
+
+def _sse_chunk(text: str) -> bytes:
+    return _CHUNK_FRAME_PREFIX + orjson.dumps(text) + _CHUNK_FRAME_SUFFIX
+
+
+class _CachedAnswer:
+    """
+    A cached chat result plus its encoded replay frames. The result dict is
+    never handed out or mutated (hits return copies); the frames are built
+    on the first streamed replay so repeat hits send pre-built bytes.
     """
-    Generator that yields SSE-formatted events:
-    - event: metadata (sources, confidence)
-    - event: chunk (text pieces as they arrive)
+    __slots__ = ("result", "_frames")
+
+    def __init__(self, result):
+        self.result = result
+        self._frames = None
+
+    def replay_frames(self) -> tuple:
+        """Metadata and whole-answer chunk frames for this result."""
+        if self._frames is None:
+            result = self.result
+            self._frames = (
+                _sse_event({'type': 'metadata', 'sources': result["sources"], 'confidence': result["confidence"], 'matches_found': result["matches_found"], 'model': result["model"]}),
+                _sse_chunk(result["answer"]),
+            )
+        return self._frames
+
+
+async def chat_stream(query, conversation_history=None, result=None):
+    """
+    Async generator that yields SSE-formatted events as bytes:
+    - event: metadata (sources, confidence, matches_found, model)
+    - event: chunk (text pieces, buffered for up to 64 chars / 30ms)
     - event: done (full answer, latency)
+
+    Cached answers are replayed as one chunk, without retrieval or LLM calls.
+    If `result` is a dict, it is filled with the same fields chat() returns
+    once the stream completes, so callers never have to parse the frames.
     """
     start_time = time.time()
 
-    matches = retrieve_context(query)
-    context_block = build_context_block(matches)
-    messages = _build_messages(query, context_block, conversation_history)
-
-    confidence = _calc_confidence(matches)
+    # Replay cached answers (exact, then semantic) without calling the LLM
+    if not conversation_history:
+        cache_key = cache.make_key(query)
+        cached = cache.get_by_key(cache_key)
+        if cached is None:
+            query_embedding = await embed_query(query)
+            cached = semantic_cache.get(query_embedding)
+        if cached:
+            elapsed = round(time.time() - start_time, 3)
+            for frame in cached.replay_frames():
+                yield frame
+            yield _sse_event({'type': 'done', 'answer': cached.result["answer"], 'latency_seconds': elapsed})
+            if result is not None:
+                result.update(
+                    {key: cached.result[key] for key in ("answer", "sources", "confidence", "model", "matches_found")},
+                    latency_seconds=elapsed,
+                )
+            return
+
+    matches = await retrieve_context(query)
+    direct_answer = _direct_answer(matches)
+
+    if direct_answer:
+        confidence = matches[0]["score"]
+        model = DIRECT_ANSWER_MODEL
+    else:
+        confidence = _calc_confidence(matches)
+        model = CHAT_MODEL
     sources = _build_sources(matches)
 
     # Yield metadata first so frontend can show sources immediately
-    yield f"data: {json.dumps({'type': 'metadata', 'sources': sources, 'confidence': confidence}, ensure_ascii=False)}\n\n"
-
-    # Stream LLM response
-    stream = openai_client.chat.completions.create(
-        model=CHAT_MODEL, messages=messages,
-        temperature=0.3, max_tokens=MAX_TOKENS, stream=True,
-    )
-
-    full_answer = ""
-    for chunk in stream:
-        if chunk.choices[0].delta.content:
-            text = chunk.choices[0].delta.content
-            full_answer += text
-            yield f"data: {json.dumps({'type': 'chunk', 'content': text}, ensure_ascii=False)}\n\n"
+    yield _sse_event({'type': 'metadata', 'sources': sources, 'confidence': confidence, 'matches_found': len(matches), 'model': model})
+
+    if direct_answer:
+        full_answer = direct_answer
+        yield _sse_chunk(direct_answer)
+    else:
+        # Stream LLM response
+        context_block = build_context_block(matches)
+        messages = _build_messages(query, context_block, conversation_history)
+        stream = await openai_client.chat.completions.create(
+            model=CHAT_MODEL, messages=messages,
+            temperature=0.3, max_tokens=MAX_TOKENS, stream=True,
+        )
+
+        parts = []
+        buffer = ""
+        last_flush = time.monotonic()
+        async for chunk in stream:
+            if chunk.choices[0].delta.content:
+                text = chunk.choices[0].delta.content
+                parts.append(text)
+                buffer += text
+                if (
+                    len(buffer) >= STREAM_FLUSH_CHARS
+                    or time.monotonic() - last_flush >= STREAM_FLUSH_SECONDS
+                ):
+                    yield _sse_chunk(buffer)
+                    buffer = ""
+                    last_flush = time.monotonic()
+        if buffer:
+            yield _sse_chunk(buffer)
+        full_answer = "".join(parts)
 
     elapsed = round(time.time() - start_time, 3)
 
+    final = {
+        "answer": full_answer, "sources": sources,
+        "confidence": confidence, "latency_seconds": elapsed,
+        "model": model, "matches_found": len(matches),
+    }
+
     # Cache result
     if not conversation_history:
-        result = {
-            "answer": full_answer, "sources": sources,
-            "confidence": confidence, "latency_seconds": elapsed,
-            "model": CHAT_MODEL, "matches_found": len(matches),
-        }
-        cache.put(query, result)
+        entry = _CachedAnswer(final)
+        cache.put_by_key(cache_key, entry)
+        semantic_cache.put(query_embedding, entry)
 
     # Final event
-    yield f"data: {json.dumps({'type': 'done', 'answer': full_answer, 'latency_seconds': elapsed}, ensure_ascii=False)}\n\n"
+    yield _sse_event({'type': 'done', 'answer': full_answer, 'latency_seconds': elapsed})
+    if result is not None:
+        result.update(final)
 
     logger.info(f"Streamed response — confidence: {confidence}, latency: {elapsed}s")
 
 
 def clear_cache():
-    """Clear the query cache. Call after re-indexing."""
+    """Clear the query, retrieval and semantic caches. Call after re-indexing."""
     cache.clear()
+    retrieval_cache.clear()
+    semantic_cache.clear()
+
+
+PREWARM_TOP_N = 50
+PREWARM_DAYS = 7
+
+
+async def prewarm_cache(top_n=PREWARM_TOP_N):
+    """
+    Refill the embedding and retrieval caches with the most frequently asked
+    recent questions, so the first visitors after a re-index don't pay for
+    cold lookups. Retrieval only — no LLM calls are made.
+
+    The embeddings (24h TTL) are what keeps paying off: the retrieval cache
+    expires after 5 minutes, after which these questions still skip the
+    embed call and only re-run the vector search.
+    """
+    top = await asyncio.to_thread(
+        get_top_questions, days=PREWARM_DAYS, limit=top_n, force=True
+    )
+    queries = [row["question"] for row in top["top_questions"]]
+    if queries:
+        # Embedded together (the batcher sends one API call), then searched
+        await asyncio.gather(*(embed_query(query) for query in queries))
+        await retrieve_contexts(queries)
+    logger.info(f"Prewarmed embedding and retrieval caches with {len(queries)} frequent queries")
@@ -27,6 +27,16 @@ OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY", "")
 EMBEDDING_MODEL = "text-embedding-3-small"
 CHAT_MODEL = "gpt-4o-mini"
 
+# ── Chat ──
+# Top match score at/above which the stored answer is returned verbatim,
+# skipping the LLM call. Set above 1 to disable.
+DIRECT_ANSWER_THRESHOLD = float(os.environ.get("DIRECT_ANSWER_THRESHOLD", "0.92"))
+# Keep cached query embeddings as int8 (4x smaller) instead of float32.
+USE_INT8_EMBEDDINGS = os.environ.get("USE_INT8_EMBEDDINGS", "false").lower() == "true"
+# File the query-embedding cache is saved to on shutdown and reloaded from
+# on startup. Empty disables persistence.
+EMBEDDING_CACHE_PATH = os.environ.get("EMBEDDING_CACHE_PATH", "")
+
 # ── App ──
 APP_ENV = os.environ.get("APP_ENV", "development")
 APP_PORT = int(os.environ.get("APP_PORT", 8000))
@@ -34,7 +44,11 @@ LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
 
 # ── Database ──
 DATABASE_URL = os.environ.get("DATABASE_PUBLIC_URL") or os.environ.get("DATABASE_URL", "sqlite:///./company_qa.db")
+# Connection pool for Postgres (ignored for SQLite)
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "20"))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", "10"))
 
 # ── Analytics ──
 ANALYTICS_API_KEY = os.environ.get("ANALYTICS_API_KEY", "")
-LOW_CONFIDENCE_THRESHOLD = float(os.environ.get("LOW_CONFIDENCE_THRESHOLD", "0.4"))
\ No newline at end of file
+LOW_CONFIDENCE_THRESHOLD = float(os.environ.get("LOW_CONFIDENCE_THRESHOLD", "0.4"))
+ANALYTICS_CACHE_TTL = int(os.environ.get("ANALYTICS_CACHE_TTL", "120"))
\ No newline at end of file
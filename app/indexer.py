@@ -11,6 +11,7 @@ Handles the full re-indexing pipeline:
 import hashlib
 import logging
 import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Optional
 
 from openai import OpenAI
@@ -28,6 +29,10 @@ from app.sheets_fetcher import fetch_sheet_data
 logger = logging.getLogger(__name__)
 
 BATCH_SIZE = 50
+# Embedding batches in flight at once (bounded to stay within rate limits)
+EMBEDDING_WORKERS = 8
+# Upsert batches in flight at once
+UPSERT_WORKERS = 10
 
 # Initialize clients
 openai_client = OpenAI(api_key=OPENAI_API_KEY)
@@ -87,7 +92,7 @@ def build_vector_id(record: dict) -> str:
     """Deterministic vector ID from content hash."""
     identifier = record.get("id", "").strip() or str(record["_row_number"])
     content = f"{identifier}-{record['question'].strip()}"
-    return hashlib.md5(content.encode()).hexdigest()
+    return hashlib.blake2b(content.encode(), digest_size=16).hexdigest()
 
 
 def generate_embeddings(texts: List[str]) -> List[List[float]]:
@@ -102,6 +107,7 @@ def generate_embeddings(texts: List[str]) -> List[List[float]]:
 def reindex_company_qa(
     spreadsheet_id: str,
     sheet_name: str = "Sheet1",
+    records: Optional[List[Dict]] = None,
 ) -> dict:
     """
     Full re-index pipeline.
@@ -109,10 +115,13 @@ def reindex_company_qa(
     Steps:
     1. Fetch all active records from Google Sheets
     2. Build chunk text + metadata for each record
-    3. Generate embeddings in batches
+    3. Generate embeddings in concurrent batches
     4. Clear the Pinecone namespace
     5. Upsert all new vectors
 
+    Pass `records` when the caller has already fetched the sheet, to skip
+    fetching it again.
+
     Returns a summary dict with counts and timing.
     """
     start_time = time.time()
@@ -123,7 +132,8 @@ def reindex_company_qa(
     logger.info(f"  Namespace: {COMPANY_QA_NAMESPACE}")
 
     # ── Step 1: Fetch data ──
-    records = fetch_sheet_data(spreadsheet_id, sheet_name)
+    if records is None:
+        records = fetch_sheet_data(spreadsheet_id, sheet_name)
     if not records:
         logger.warning("No active records found. Skipping re-index.")
         return {"status": "skipped", "reason": "no_active_records", "record_count": 0}
@@ -143,20 +153,22 @@ def reindex_company_qa(
     pc = Pinecone(api_key=PINECONE_API_KEY)
     index = pc.Index(PINECONE_INDEX_NAME)
 
-    all_vectors = []
-    for i in range(0, len(chunks), BATCH_SIZE):
-        batch = chunks[i : i + BATCH_SIZE]
-        texts = [c["text"] for c in batch]
-
-        logger.info(f"Embedding batch {i // BATCH_SIZE + 1} ({len(batch)} chunks)...")
-        embeddings = generate_embeddings(texts)
+    batches = [chunks[i : i + BATCH_SIZE] for i in range(0, len(chunks), BATCH_SIZE)]
+    logger.info(f"Embedding {len(batches)} batches ({EMBEDDING_WORKERS} concurrent)...")
+    with ThreadPoolExecutor(max_workers=EMBEDDING_WORKERS) as executor:
+        # map() keeps batch order; each call blocks on its own HTTP round-trip
+        batch_embeddings = executor.map(
+            generate_embeddings, [[c["text"] for c in batch] for batch in batches]
+        )
 
-        for chunk, embedding in zip(batch, embeddings):
-            all_vectors.append({
-                "id": chunk["vector_id"],
-                "values": embedding,
-                "metadata": chunk["metadata"],
-            })
+        all_vectors = []
+        for batch, embeddings in zip(batches, batch_embeddings):
+            for chunk, embedding in zip(batch, embeddings):
+                all_vectors.append({
+                    "id": chunk["vector_id"],
+                    "values": embedding,
+                    "metadata": chunk["metadata"],
+                })
 
     # ── Step 4: Clear namespace ──
     logger.info(f"Clearing existing '{COMPANY_QA_NAMESPACE}' namespace...")
@@ -166,14 +178,21 @@ def reindex_company_qa(
         logger.warning(f"Namespace clear warning (may be empty): {e}")
 
     # ── Step 5: Upsert ──
-    logger.info(f"Upserting {len(all_vectors)} vectors...")
-    for i in range(0, len(all_vectors), BATCH_SIZE):
-        batch = all_vectors[i : i + BATCH_SIZE]
-        index.upsert(
+    logger.info(f"Upserting {len(all_vectors)} vectors ({UPSERT_WORKERS} concurrent)...")
+
+    def upsert_batch(batch):
+        return index.upsert(
             vectors=[(v["id"], v["values"], v["metadata"]) for v in batch],
             namespace=COMPANY_QA_NAMESPACE,
         )
 
+    with ThreadPoolExecutor(max_workers=UPSERT_WORKERS) as executor:
+        # list() waits for every batch and re-raises the first failure
+        list(executor.map(
+            upsert_batch,
+            [all_vectors[i : i + BATCH_SIZE] for i in range(0, len(all_vectors), BATCH_SIZE)],
+        ))
+
     elapsed = round(time.time() - start_time, 2)
     logger.info(f"Re-indexing complete. {len(all_vectors)} vectors in '{COMPANY_QA_NAMESPACE}' ({elapsed}s)")
     logger.info("=" * 60)
@@ -3,12 +3,17 @@ Conversation Logger.
 
 Stores every chat interaction to the database for analytics.
 Handles session management (creating new sessions, updating existing ones).
+Request handlers enqueue interactions on `log_writer`, which writes them
+in batches (one commit per batch) off the request path.
 """
 
+import asyncio
 import logging
+import re
 from datetime import datetime, timezone
 
-from app.models import SessionLocal, Conversation, Message
+from app.batching import QueueBatcher
+from app.models import SessionLocal, log_messages_bulk
 from app.config import LOW_CONFIDENCE_THRESHOLD
 
 logger = logging.getLogger(__name__)
@@ -22,82 +27,99 @@ FALLBACK_INDICATORS = [
     "02-1234-5678",
 ]
 
+# One alternation scans the answer once instead of once per indicator
+_FALLBACK_RE = re.compile("|".join(re.escape(indicator) for indicator in FALLBACK_INDICATORS))
+
 
 def is_fallback_response(answer: str) -> bool:
     """Check if the bot's answer is a fallback/unable-to-answer response."""
-    return any(indicator in answer for indicator in FALLBACK_INDICATORS)
-
-
-def log_interaction(
-    session_id: str,
-    query: str,
-    answer: str,
-    confidence: float,
-    sources: list,
-    matches_found: int,
-    latency_seconds: float,
-    model: str,
-):
+    return _FALLBACK_RE.search(answer) is not None
+
+
+def log_interactions(interactions: list):
     """
-    Log a single chat interaction to the database.
+    Log a batch of chat interactions in one transaction. Each is a dict
+    with session_id, query, answer, confidence, sources, matches_found,
+    latency_seconds and model, optionally with a `timestamp`.
 
-    Creates a new conversation if this session_id hasn't been seen,
-    or appends to an existing conversation.
+    Creates a new conversation for each session_id that hasn't been seen,
+    or appends to the existing conversation.
     """
     db = SessionLocal()
     try:
-        # Find or create conversation
-        conversation = (
-            db.query(Conversation)
-            .filter(Conversation.session_id == session_id)
-            .first()
-        )
-
-        if not conversation:
-            conversation = Conversation(
-                session_id=session_id,
-                started_at=datetime.now(timezone.utc),
-                last_message_at=datetime.now(timezone.utc),
-                message_count=0,
-            )
-            db.add(conversation)
-            db.flush()
-
-        # Update conversation
-        conversation.last_message_at = datetime.now(timezone.utc)
-        conversation.message_count += 1
-
-        # Determine flags
-        low_confidence = confidence < LOW_CONFIDENCE_THRESHOLD
-        unanswered = is_fallback_response(answer)
-
-        # Create message
-        message = Message(
-            conversation_id=conversation.id,
-            session_id=session_id,
-            timestamp=datetime.now(timezone.utc),
-            query=query,
-            answer=answer,
-            confidence=confidence,
-            matches_found=matches_found,
-            latency_seconds=latency_seconds,
-            model=model,
-            sources=sources,
-            is_low_confidence=low_confidence,
-            is_unanswered=unanswered,
-        )
-        db.add(message)
+        now = datetime.now(timezone.utc)
+
+        rows = []
+        for item in interactions:
+            rows.append({
+                "session_id": item["session_id"],
+                "timestamp": item.get("timestamp") or now,
+                "query": item["query"],
+                "answer": item["answer"],
+                "confidence": item["confidence"],
+                "matches_found": item["matches_found"],
+                "latency_seconds": item["latency_seconds"],
+                "model": item["model"],
+                "sources": item["sources"],
+                # Determine flags
+                "is_low_confidence": item["confidence"] < LOW_CONFIDENCE_THRESHOLD,
+                "is_unanswered": is_fallback_response(item["answer"]),
+            })
+
+        conversation_ids = log_messages_bulk(db, rows, now)
         db.commit()
 
         logger.info(
-            f"Logged interaction [{session_id}] — "
-            f"confidence: {confidence}, "
-            f"low_confidence: {low_confidence}, "
-            f"unanswered: {unanswered}"
+            f"Logged {len(rows)} interactions across {len(conversation_ids)} sessions"
         )
 
     except Exception as e:
         db.rollback()
-        logger.error(f"Failed to log interaction: {e}", exc_info=True)
+        logger.error(f"Failed to log {len(interactions)} interactions: {e}", exc_info=True)
     finally:
         db.close()
+
+
+# ═══════════════════════════════════════════════════════════
+# Background writer
+# ═══════════════════════════════════════════════════════════
+
+LOG_BATCH_MAX_SIZE = 50
+LOG_BATCH_WINDOW_SECONDS = 0.1
+LOG_QUEUE_MAX_SIZE = 10000
+
+
+class InteractionLogWriter(QueueBatcher):
+    """
+    Buffers interactions in an asyncio queue and writes them with
+    `log_interactions` in batches of up to `max_batch_size`, collected for
+    at most `window_seconds`. Handlers return without waiting on the
+    database; an unclean exit loses at most one window of logs.
+    """
+
+    def __init__(self, max_batch_size=50, window_seconds=0.1, max_queue_size=10000):
+        super().__init__(max_batch_size, window_seconds, max_queue_size)
+
+    async def enqueue(self, **interaction):
+        interaction.setdefault("timestamp", datetime.now(timezone.utc))
+        await self._put(interaction)
+
+    async def flush(self):
+        """Wait until everything enqueued so far has been written."""
+        if self._queue is not None and self._loop is asyncio.get_running_loop():
+            await self._queue.join()
+
+    async def _handle_batch(self, batch):
+        try:
+            # Sync DB write — keep it off the event loop
+            await asyncio.to_thread(log_interactions, batch)
+        finally:
+            for _ in batch:
+                self._queue.task_done()
+
+
+log_writer = InteractionLogWriter(
+    max_batch_size=LOG_BATCH_MAX_SIZE,
+    window_seconds=LOG_BATCH_WINDOW_SECONDS,
+    max_queue_size=LOG_QUEUE_MAX_SIZE,
+)
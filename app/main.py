@@ -14,8 +14,9 @@ from datetime import datetime, timezone
 from typing import Optional, List, Dict
 
 from fastapi import FastAPI, HTTPException, BackgroundTasks, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 
@@ -27,8 +28,15 @@ from app.config import (
     LOG_LEVEL,
 )
 from app.indexer import reindex_company_qa
-from app.chat import chat, chat_stream, clear_cache
-from app.logger import log_interaction
+from app.chat import (
+    chat,
+    chat_stream,
+    clear_cache,
+    prewarm_cache,
+    load_embedding_cache,
+    save_embedding_cache,
+)
+from app.logger import log_writer
 from app.models import init_db
 from app.analytics_router import router as analytics_router
 
@@ -45,6 +53,7 @@ app = FastAPI(
     title="Company Q&A Bot",
     description="AI-powered Q&A bot with Google Sheets knowledge base",
     version="1.0.0",
+    default_response_class=ORJSONResponse,
 )
 
 # ── CORS ──
@@ -62,11 +71,18 @@ app.add_middleware(
 # ── Include analytics router ──
 app.include_router(analytics_router)
 
-# ── Initialize database on startup ──
+# ── Initialize database (and warm caches) on startup ──
 @app.on_event("startup")
 def startup_event():
     init_db()
     logger.info("Database initialized")
+    load_embedding_cache()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await log_writer.flush()
+    save_embedding_cache()
 
 
 # ═══════════════════════════════════════════════════════════
@@ -96,6 +112,31 @@ class ChatResponse(BaseModel):
     matches_found: int
 
 
+# ═══════════════════════════════════════════════════════════
+# Re-indexing (background)
+# ═══════════════════════════════════════════════════════════
+
+async def reindex_and_prewarm(spreadsheet_id: str, sheet_name: str):
+    """
+    Re-index, then drop the now-stale caches and prewarm retrieval for the
+    most frequent questions. Caches are cleared only once the new index is
+    in place, so nothing stale gets cached while the re-index runs.
+    """
+    result = await run_in_threadpool(
+        reindex_company_qa,
+        spreadsheet_id=spreadsheet_id,
+        sheet_name=sheet_name,
+    )
+    if result.get("status") != "success":
+        return
+
+    clear_cache()
+    try:
+        await prewarm_cache()
+    except Exception as e:
+        logger.error(f"Cache prewarm failed: {e}", exc_info=True)
+
+
 # ═══════════════════════════════════════════════════════════
 # Webhook Endpoint (Step 3 — receives Google Apps Script POST)
 # ═══════════════════════════════════════════════════════════
@@ -122,7 +163,7 @@ async def handle_sheets_webhook(
 
     # Trigger re-indexing in background
     background_tasks.add_task(
-        reindex_company_qa,
+        reindex_and_prewarm,
         spreadsheet_id=payload.spreadsheet_id,
         sheet_name=payload.sheet_name,
     )
@@ -155,7 +196,7 @@ async def handle_chat(request: ChatRequest):
     logger.info(f"Chat query [{session_id}]: {request.query[:80]}...")
 
     try:
-        result = chat(
+        result = await chat(
             query=request.query,
             conversation_history=request.conversation_history,
         )
@@ -163,9 +204,13 @@ async def handle_chat(request: ChatRequest):
         logger.error(f"Chat error: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to generate response")
 
-    # Log the interaction for analytics
+    # One timestamp for both the log row and the response
+    now = datetime.now(timezone.utc)
+
+    # Log the interaction for analytics (written in batches in the background)
     try:
-        log_interaction(
+        await log_writer.enqueue(
+            timestamp=now,
             session_id=session_id,
             query=request.query,
             answer=result["answer"],
@@ -183,7 +228,7 @@ async def handle_chat(request: ChatRequest):
         sources=result["sources"],
         confidence=result["confidence"],
         session_id=session_id,
-        timestamp=datetime.now(timezone.utc).isoformat(),
+        timestamp=now.isoformat(),
         latency_seconds=result["latency_seconds"],
         matches_found=result["matches_found"],
     )
@@ -206,39 +251,28 @@ async def handle_chat_stream(request: ChatRequest):
     session_id = request.session_id or str(uuid.uuid4())
     logger.info(f"Stream chat [{session_id}]: {request.query[:80]}...")
 
-    def event_generator():
-        full_answer = ""
-        metadata = {}
+    async def event_generator():
+        # chat_stream fills this in once the stream completes
+        result = {}
 
-        for event in chat_stream(
+        async for event in chat_stream(
             query=request.query,
             conversation_history=request.conversation_history,
+            result=result,
         ):
             yield event
 
-            # Parse SSE events to capture metadata and full answer
-            if event.startswith("data: "):
-                try:
-                    import json as _json
-                    payload = _json.loads(event[6:].strip())
-                    if payload.get("type") == "metadata":
-                        metadata = payload
-                    elif payload.get("type") == "chunk":
-                        full_answer += payload.get("text", "")
-                except Exception:
-                    pass
-
         # Log after streaming completes
         try:
-            log_interaction(
+            await log_writer.enqueue(
                 session_id=session_id,
                 query=request.query,
-                answer=full_answer,
-                confidence=metadata.get("confidence", 0.0),
-                sources=metadata.get("sources", []),
-                matches_found=metadata.get("matches_found", 0),
-                latency_seconds=metadata.get("latency_seconds", 0.0),
-                model=metadata.get("model", ""),
+                answer=result.get("answer", ""),
+                confidence=result.get("confidence", 0.0),
+                sources=result.get("sources", []),
+                matches_found=result.get("matches_found", 0),
+                latency_seconds=result.get("latency_seconds", 0.0),
+                model=result.get("model", ""),
             )
         except Exception as e:
             logger.error(f"Failed to log streamed interaction: {e}", exc_info=True)
@@ -249,6 +283,8 @@ async def handle_chat_stream(request: ChatRequest):
         headers={
             "Cache-Control": "no-cache",
             "Connection": "keep-alive",
+            # Stop nginx-style proxies from buffering the token stream
+            "X-Accel-Buffering": "no",
             "X-Session-Id": session_id,
         },
     )
@@ -266,15 +302,13 @@ async def manual_reindex(background_tasks: BackgroundTasks):
     """
     logger.info("Manual re-index triggered via admin endpoint")
 
+    # Caches are cleared and prewarmed once the new index is in place
     background_tasks.add_task(
-        reindex_company_qa,
+        reindex_and_prewarm,
         spreadsheet_id=COMPANY_QA_SPREADSHEET_ID,
         sheet_name=COMPANY_QA_SHEET_NAME,
     )
 
-    # Clear query cache since knowledge base is changing
-    clear_cache()
-
     return {
         "status": "accepted",
         "message": "Re-indexing triggered",
@@ -306,6 +340,17 @@ import os
 from fastapi.responses import FileResponse, RedirectResponse
 
 static_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "static")
+app.mount("/static", StaticFiles(directory=static_dir), name="static")
+
+# Paths resolved once; FileResponse stats the file per request, so edited
+# pages (e.g. under --reload, which only watches .py) are served correctly
+CHAT_PAGE = os.path.join(static_dir, "chat.html")
+DASHBOARD_PAGE = os.path.join(static_dir, "dashboard.html")
+PAGE_HEADERS = {"Cache-Control": "public, max-age=60"}
+
+
+def _page_response(path: str) -> FileResponse:
+    return FileResponse(path, media_type="text/html", headers=PAGE_HEADERS)
 
 @app.get("/")
 async def root():
@@ -315,9 +360,9 @@ async def root():
 @app.get("/chat")
 async def chat_page():
     """Serve the chat demo page."""
-    return FileResponse(os.path.join(static_dir, "chat.html"))
+    return _page_response(CHAT_PAGE)
 
 @app.get("/dashboard")
 async def dashboard_page():
     """Serve the analytics dashboard."""
-    return FileResponse(os.path.join(static_dir, "dashboard.html"))
\ No newline at end of file
+    return _page_response(DASHBOARD_PAGE)
\ No newline at end of file
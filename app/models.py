@@ -4,31 +4,85 @@ Database models for conversation logging and analytics.
 Tables:
     - conversations: Groups messages into sessions
     - messages: Individual Q&A interactions with full metadata
+    - message_daily_rollup: Per-day, per-query aggregates of messages
+    - weekly_summaries: Stored AI-generated weekly management summaries
 """
 
+import re
 from datetime import datetime, timezone
+import orjson
 from sqlalchemy import (
-    create_engine, Column, Integer, String, Float, Text,
-    DateTime, Boolean, ForeignKey, JSON
+    create_engine, inspect, text, select, update, delete, bindparam, Column, Integer, String,
+    Float, Text, Date, DateTime, Boolean, ForeignKey, JSON, Index
 )
+from sqlalchemy.dialects.postgresql import JSONB, insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
 
-from app.config import DATABASE_URL
+from app.config import DATABASE_URL, DB_POOL_SIZE, DB_MAX_OVERFLOW
 
 # ── Engine & Session ──
-engine = create_engine(DATABASE_URL, echo=False)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Server databases get a larger pool sized for concurrent chat logging and
+# analytics, with pre-ping/recycle so restarts and idle timeouts don't
+# surface as errors. SQLite keeps SQLAlchemy's default file pool.
+_pool_options = {} if DATABASE_URL.startswith("sqlite") else {
+    "pool_size": DB_POOL_SIZE,
+    "max_overflow": DB_MAX_OVERFLOW,
+    "pool_timeout": 30,
+    "pool_pre_ping": True,
+    "pool_recycle": 3600,
+}
+
+# orjson for the JSON columns: faster, and keeps non-ASCII text unescaped
+engine = create_engine(
+    DATABASE_URL,
+    echo=False,
+    json_serializer=lambda value: orjson.dumps(value).decode(),
+    json_deserializer=orjson.loads,
+    **_pool_options,
+)
+# Loaded objects stay readable after commit instead of re-SELECTing
+SessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, expire_on_commit=False, bind=engine
+)
 Base = declarative_base()
 
 
 def get_db():
-    """Dependency for FastAPI — yields a DB session."""
-    db = SessionLocal()
-    try:
+    """
+    Dependency for FastAPI — yields a DB session inside a transaction that
+    commits when the request finishes and rolls back if it raises, so no
+    connection goes back to the pool mid-transaction.
+    """
+    with SessionLocal() as db, db.begin():
         yield db
-    finally:
-        db.close()
+
+
+# ═══════════════════════════════════════════════════════════
+# Query normalization
+# ═══════════════════════════════════════════════════════════
+
+NORMALIZED_QUERY_MAX_LENGTH = 200
+_PUNCT_AND_SPACE = re.compile(r"[\W_]+")
+
+
+def normalize_query(query: str) -> str:
+    """
+    Grouping key for analytics: lowercased, punctuation and whitespace
+    collapsed to single spaces, so "公司地址?" and "公司地址？" count as one
+    question. Capped so it stays indexable.
+    """
+    normalized = _PUNCT_AND_SPACE.sub(" ", query.lower()).strip()
+    return (normalized or query.strip().lower())[:NORMALIZED_QUERY_MAX_LENGTH]
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _query_normalized_default(context):
+    return normalize_query(context.get_current_parameters()["query"])
 
 
 # ═══════════════════════════════════════════════════════════
@@ -41,11 +95,15 @@ class Conversation(Base):
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     session_id = Column(String(100), unique=True, nullable=False, index=True)
-    started_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
-    last_message_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    started_at = Column(DateTime, default=_utcnow)
+    last_message_at = Column(DateTime, default=_utcnow)
     message_count = Column(Integer, default=0)
 
-    messages = relationship("Message", back_populates="conversation")
+    # lazy="raise": iterating conversations can't N+1 by accident; load
+    # explicitly with options(selectinload(Conversation.messages))
+    messages = relationship(
+        "Message", back_populates="conversation", lazy="raise", order_by="Message.timestamp"
+    )
 
 
 class Message(Base):
@@ -54,11 +112,14 @@ class Message(Base):
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     conversation_id = Column(Integer, ForeignKey("conversations.id"), nullable=False)
-    session_id = Column(String(100), nullable=False, index=True)
-    timestamp = Column(DateTime, default=lambda: datetime.now(timezone.utc), index=True)
+    session_id = Column(String(100), nullable=False)
+    timestamp = Column(DateTime, default=_utcnow)
 
     # Query & Response
     query = Column(Text, nullable=False)
+    query_normalized = Column(
+        String(NORMALIZED_QUERY_MAX_LENGTH), default=_query_normalized_default
+    )
     answer = Column(Text, nullable=False)
 
     # Retrieval metadata
@@ -67,17 +128,236 @@ class Message(Base):
     latency_seconds = Column(Float, default=0.0)
     model = Column(String(50), default="")
 
-    # Sources (stored as JSON array)
-    sources = Column(JSON, default=list)
+    # Sources (stored as JSON array; binary JSONB on PostgreSQL)
+    sources = Column(JSON().with_variant(JSONB(), "postgresql"), default=list)
 
     # Flags
-    is_low_confidence = Column(Boolean, default=False, index=True)
-    is_unanswered = Column(Boolean, default=False, index=True)
+    is_low_confidence = Column(Boolean, default=False)
+    is_unanswered = Column(Boolean, default=False)
+
+    conversation = relationship("Conversation", back_populates="messages", lazy="raise")
+
+    # Analytics access paths: recent unanswered / low-confidence messages
+    # (partial indexes, a fraction of the table), distinct sessions over a
+    # time window (index-only scan) and a session's messages in order. The
+    # leading columns also serve plain timestamp and session_id lookups.
+    __table_args__ = (
+        Index(
+            "idx_msgs_ts_unans", timestamp.desc(),
+            postgresql_where=is_unanswered, sqlite_where=is_unanswered,
+        ),
+        Index(
+            "idx_msgs_ts_low", timestamp.desc(),
+            postgresql_where=is_low_confidence, sqlite_where=is_low_confidence,
+        ),
+        Index("idx_msgs_ts_session", timestamp, session_id),
+        Index("idx_msgs_session_ts", session_id, timestamp),
+        Index("idx_msgs_qnorm_ts", query_normalized, timestamp),
+    )
+
+
+class MessageDailyRollup(Base):
+    """
+    Per-day, per-query aggregates of `messages`, written by app/rollup.py.
+
+    Keyed by the normalized query; `query` keeps one original wording for
+    display. Only complete days are rolled up; confidence is stored as a
+    sum so averages stay exact when days are combined.
+    """
+    __tablename__ = "message_daily_rollup"
+
+    date = Column(Date, primary_key=True)
+    query_normalized = Column(String(NORMALIZED_QUERY_MAX_LENGTH), primary_key=True)
+    query = Column(Text, nullable=False)
+
+    message_count = Column(Integer, nullable=False, default=0)
+    confidence_sum = Column(Float, nullable=False, default=0.0)
+    unanswered_count = Column(Integer, nullable=False, default=0)
+    low_confidence_count = Column(Integer, nullable=False, default=0)
+
+
+class CategoryDailyRollup(Base):
+    """
+    Per-day, per-category counts of matched sources, written by
+    app/rollup.py in the same run (and up to the same day) as
+    `MessageDailyRollup`, whose watermark covers both.
+    """
+    __tablename__ = "category_daily_rollup"
+
+    date = Column(Date, primary_key=True)
+    category = Column(Text, primary_key=True)
+    match_count = Column(Integer, nullable=False, default=0)
+
 
-    conversation = relationship("Conversation", back_populates="messages")
+class WeeklySummary(Base):
+    """AI-generated weekly management summary, one row per generation day."""
+    __tablename__ = "weekly_summaries"
+
+    date = Column(Date, primary_key=True)
+    payload = Column(JSON, nullable=False)
+
+
+class SyncState(Base):
+    """Small key/value store for sync bookkeeping (e.g., the last sheet hash)."""
+    __tablename__ = "sync_state"
+
+    key = Column(String(64), primary_key=True)
+    value = Column(Text)
+    updated_at = Column(DateTime, default=_utcnow, onupdate=_utcnow)
+
+
+# ── Bulk logging ──
+
+def log_messages_bulk(db, rows: list, now: datetime = None) -> dict:
+    """
+    Insert a batch of messages (dicts of Message columns, without
+    conversation_id) and upsert their conversations in two statements: one
+    INSERT ... ON CONFLICT (session_id) for every session in the batch, then
+    one multi-row INSERT for the messages. `now` stamps the conversations
+    (the caller's batch clock read, if it has one). The caller commits.
+
+    Returns {session_id: conversation_id}.
+    """
+    now = now or _utcnow()
+    counts = {}
+    for row in rows:
+        counts[row["session_id"]] = counts.get(row["session_id"], 0) + 1
+
+    insert = pg_insert if db.bind.dialect.name == "postgresql" else sqlite_insert
+    upsert = insert(Conversation).values([
+        {
+            "session_id": session_id,
+            "started_at": now,
+            "last_message_at": now,
+            "message_count": count,
+        }
+        for session_id, count in counts.items()
+    ])
+    upsert = upsert.on_conflict_do_update(
+        index_elements=[Conversation.session_id],
+        set_={
+            "last_message_at": upsert.excluded.last_message_at,
+            "message_count": Conversation.message_count + upsert.excluded.message_count,
+        },
+    ).returning(Conversation.session_id, Conversation.id)
+    conversation_ids = dict(db.execute(upsert).all())
+
+    db.execute(
+        Message.__table__.insert(),
+        [{**row, "conversation_id": conversation_ids[row["session_id"]]} for row in rows],
+    )
+    return conversation_ids
+
+
+# ── Sync state ──
+
+def get_sync_state(db, key: str) -> str | None:
+    """Return the stored value for `key`, or None if it was never set."""
+    return db.execute(select(SyncState.value).where(SyncState.key == key)).scalar()
+
+
+def set_sync_state(db, key: str, value: str):
+    """Insert or overwrite `key` in one statement. The caller commits."""
+    insert = pg_insert if db.bind.dialect.name == "postgresql" else sqlite_insert
+    upsert = insert(SyncState).values(key=key, value=value, updated_at=_utcnow())
+    db.execute(upsert.on_conflict_do_update(
+        index_elements=[SyncState.key],
+        set_={"value": upsert.excluded.value, "updated_at": upsert.excluded.updated_at},
+    ))
 
 
 # ── Create tables ──
+# Single-column indexes superseded by the composite / partial ones above;
+# dropped from existing databases so inserts stop maintaining them
+OBSOLETE_INDEXES = {
+    "messages": [
+        "ix_messages_session_id",
+        "ix_messages_timestamp",
+        "ix_messages_is_low_confidence",
+        "ix_messages_is_unanswered",
+    ],
+}
+
+
 def init_db():
-    """Create all tables if they don't exist."""
+    """
+    Create all tables if they don't exist.
+
+    `create_all` only creates new tables, so columns and indexes added to
+    an existing table are created here as well (and obsolete indexes
+    dropped); on PostgreSQL, json columns since declared JSONB are
+    converted, and the table is re-analyzed so the planner picks up new
+    indexes. Days rolled up before the category rollup existed are cleared
+    so the next rollup run rebuilds both tables.
+    """
+    existing_tables = set(inspect(engine).get_table_names())
     Base.metadata.create_all(bind=engine)
+
+    if (
+        CategoryDailyRollup.__tablename__ not in existing_tables
+        and MessageDailyRollup.__tablename__ in existing_tables
+    ):
+        with engine.begin() as conn:
+            conn.execute(delete(MessageDailyRollup))
+
+    inspector = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        existing_columns = {col["name"]: col["type"] for col in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing_columns:
+                column_type = column.type.compile(dialect=engine.dialect)
+                with engine.begin() as conn:
+                    conn.execute(text(
+                        f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"
+                    ))
+            elif (
+                isinstance(column.type.dialect_impl(engine.dialect), JSONB)
+                and not isinstance(existing_columns[column.name], JSONB)
+            ):
+                # One-time table rewrite
+                with engine.begin() as conn:
+                    conn.execute(text(
+                        f"ALTER TABLE {table.name} ALTER COLUMN {column.name} "
+                        f"TYPE JSONB USING {column.name}::jsonb"
+                    ))
+
+        existing = {ix["name"] for ix in inspector.get_indexes(table.name)}
+        for name in OBSOLETE_INDEXES.get(table.name, ()):
+            if name in existing:
+                with engine.begin() as conn:
+                    conn.execute(text(f"DROP INDEX {name}"))
+
+        missing = [ix for ix in table.indexes if ix.name not in existing]
+        if not missing:
+            continue
+
+        if table is Message.__table__:
+            # Older rows predate query_normalized; fill it before indexing
+            _backfill_query_normalized()
+        for ix in missing:
+            ix.create(bind=engine)
+        if engine.dialect.name == "postgresql":
+            with engine.begin() as conn:
+                conn.execute(text(f"ANALYZE {table.name}"))
+
+
+def _backfill_query_normalized(batch_size: int = 1000):
+    """Fill query_normalized for messages logged before the column existed."""
+    with engine.begin() as conn:
+        while True:
+            rows = conn.execute(
+                select(Message.id, Message.query)
+                .where(Message.query_normalized.is_(None))
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            conn.execute(
+                update(Message)
+                .where(Message.id == bindparam("message_id"))
+                .values(query_normalized=bindparam("normalized")),
+                [
+                    {"message_id": message_id, "normalized": normalize_query(query)}
+                    for message_id, query in rows
+                ],
+            )
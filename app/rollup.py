@@ -0,0 +1,141 @@
+"""
+Daily analytics rollup.
+
+Aggregates complete days of `messages` into `message_daily_rollup` and
+their matched source categories into `category_daily_rollup`, so the
+analytics endpoints read one row per (day, query) or (day, category)
+instead of rescanning every message in the period. Runs nightly (e.g., via cron); anything not
+yet rolled up is still read from raw messages, so a missed run only costs
+speed, never correctness.
+"""
+
+import logging
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import func, case, select, insert, true
+
+from app.models import (
+    SessionLocal, Message, MessageDailyRollup, CategoryDailyRollup, init_db
+)
+
+logger = logging.getLogger(__name__)
+
+
+def day_start(day: date) -> datetime:
+    """Midnight (UTC) at the start of `day`, comparable with Message.timestamp."""
+    return datetime.combine(day, time.min)
+
+
+def get_rollup_watermark(db) -> Optional[date]:
+    """Return the first day NOT covered by the rollup, or None if it is empty."""
+    latest = db.query(func.max(MessageDailyRollup.date)).scalar()
+    return latest + timedelta(days=1) if latest else None
+
+
+def source_categories(db):
+    """
+    Return (sources, category): Message.sources expanded one row per source
+    element, and the expression for that element's category, in the
+    current database's JSON dialect.
+    """
+    if db.bind.dialect.name == "postgresql":
+        sources = func.jsonb_array_elements(
+            case((func.jsonb_typeof(Message.sources) == "array", Message.sources))
+        ).table_valued("value").alias("src")
+        return sources, sources.c.value.op("->>")("category")
+
+    sources = func.json_each(Message.sources).table_valued("value").alias("src")
+    return sources, func.json_extract(sources.c.value, "$.category")
+
+
+def refresh_daily_rollup() -> dict:
+    """
+    Roll up every complete day since the last run (today is never included).
+
+    Returns a summary dict.
+    """
+    db = SessionLocal()
+    try:
+        today = datetime.now(timezone.utc).date()
+        start = get_rollup_watermark(db)
+
+        if start is None:
+            first_timestamp = db.query(func.min(Message.timestamp)).scalar()
+            if first_timestamp is None:
+                logger.info("Rollup: no messages yet. Skipping.")
+                return {"status": "skipped", "reason": "no_messages"}
+            start = first_timestamp.date()
+
+        if start >= today:
+            logger.info("Rollup: already up to date.")
+            return {"status": "skipped", "reason": "up_to_date"}
+
+        day = func.date(Message.timestamp)
+        period = (
+            Message.timestamp >= day_start(start),
+            Message.timestamp < day_start(today),
+        )
+        aggregates = (
+            select(
+                day,
+                Message.query_normalized,
+                func.min(Message.query),
+                func.count(Message.id),
+                func.sum(Message.confidence),
+                func.sum(case((Message.is_unanswered == True, 1), else_=0)),
+                func.sum(case((Message.is_low_confidence == True, 1), else_=0)),
+            )
+            .where(*period)
+            .group_by(day, Message.query_normalized)
+        )
+
+        result = db.execute(
+            insert(MessageDailyRollup).from_select(
+                [
+                    "date",
+                    "query_normalized",
+                    "query",
+                    "message_count",
+                    "confidence_sum",
+                    "unanswered_count",
+                    "low_confidence_count",
+                ],
+                aggregates,
+            )
+        )
+
+        sources, category = source_categories(db)
+        category_aggregates = (
+            select(day, category, func.count())
+            .select_from(Message)
+            .join(sources, true())
+            .where(*period, category.is_not(None), category != "")
+            .group_by(day, category)
+        )
+        db.execute(
+            insert(CategoryDailyRollup).from_select(
+                ["date", "category", "match_count"], category_aggregates
+            )
+        )
+        db.commit()
+
+        logger.info(f"Rollup: {result.rowcount} rows for {start} → {today - timedelta(days=1)}")
+        return {
+            "status": "success",
+            "from_date": start.isoformat(),
+            "to_date": (today - timedelta(days=1)).isoformat(),
+            "rows": result.rowcount,
+        }
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    init_db()
+    result = refresh_daily_rollup()
+    print(result)
@@ -7,37 +7,75 @@ Uses content hashing to skip re-indexing when nothing has changed.
 
 import hashlib
 import logging
-import os
+
+import orjson
 
 from app.config import COMPANY_QA_SPREADSHEET_ID, COMPANY_QA_SHEET_NAME
-from app.sheets_fetcher import fetch_sheet_data
+from app.models import SessionLocal, get_sync_state, set_sync_state, init_db
+from app.sheets_fetcher import fetch_sheet_data, fetch_sheet_version
 from app.indexer import reindex_company_qa
 
 logger = logging.getLogger(__name__)
 
-HASH_FILE = "/tmp/company_qa_last_hash.txt"
+# Kept in the database so it survives restarts and redeploys
+HASH_KEY = "company_qa_hash"
+VERSION_KEY = "company_qa_version"
+
+
+def _canonical_record(record: dict) -> bytes:
+    """Stable byte encoding of one record (key order and spacing fixed)."""
+    return orjson.dumps(record, option=orjson.OPT_SORT_KEYS)
+
+
+def hash_records(records: list) -> str:
+    """Hash fetched sheet records to detect changes."""
+    content_hash = hashlib.blake2b(digest_size=32)
+    # Records carry their _row_number, so ordering by it is canonical and
+    # lets each encoding be hashed and dropped instead of held for a sort
+    for record in sorted(records, key=lambda r: r.get("_row_number", 0)):
+        encoded = _canonical_record(record)
+        # Length prefix keeps record boundaries unambiguous
+        content_hash.update(len(encoded).to_bytes(4, "little"))
+        content_hash.update(encoded)
+    return content_hash.hexdigest()
 
 
 def compute_sheet_hash(spreadsheet_id: str, sheet_name: str) -> str:
     """Hash the sheet content to detect changes."""
-    records = fetch_sheet_data(spreadsheet_id, sheet_name)
-    content = str(sorted([str(r) for r in records]))
-    return hashlib.sha256(content.encode()).hexdigest()
+    return hash_records(fetch_sheet_data(spreadsheet_id, sheet_name))
 
 
 def get_last_hash() -> str | None:
-    """Read the last known content hash from disk."""
+    """Read the last known content hash from the database."""
+    db = SessionLocal()
     try:
-        with open(HASH_FILE, "r") as f:
-            return f.read().strip()
-    except FileNotFoundError:
-        return None
+        return get_sync_state(db, HASH_KEY)
+    finally:
+        db.close()
+
 
+def get_last_version() -> str | None:
+    """Read the Drive revision stamp recorded at the last sync."""
+    db = SessionLocal()
+    try:
+        return get_sync_state(db, VERSION_KEY)
+    finally:
+        db.close()
 
-def save_hash(content_hash: str):
-    """Save the current content hash to disk."""
-    with open(HASH_FILE, "w") as f:
-        f.write(content_hash)
+
+def save_hash(content_hash: str, version: str | None = None):
+    """Save the current content hash (and the Drive stamp it was taken at)."""
+    db = SessionLocal()
+    try:
+        set_sync_state(db, HASH_KEY, content_hash)
+        if version is not None:
+            set_sync_state(db, VERSION_KEY, version)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
 
 
 def sync_if_changed() -> dict:
@@ -45,30 +83,46 @@ def sync_if_changed() -> dict:
     Check if the sheet content has changed since the last sync.
     If yes, trigger a full re-index. If no, skip.
 
+    The Drive revision stamp is checked first; the sheet is only downloaded
+    and hashed when it moved (or can't be read), and the content hash still
+    decides whether to re-index.
+
     Returns a summary dict.
     """
     logger.info("Scheduled sync: checking for sheet changes...")
 
-    current_hash = compute_sheet_hash(
-        COMPANY_QA_SPREADSHEET_ID, COMPANY_QA_SHEET_NAME
-    )
+    try:
+        version = fetch_sheet_version(COMPANY_QA_SPREADSHEET_ID)
+    except Exception as e:
+        logger.warning(f"Could not read sheet revision, falling back to content hash: {e}")
+        version = None
+
+    if version is not None and version == get_last_version():
+        logger.info("Sheet revision unchanged. Skipping re-index.")
+        return {"status": "skipped", "reason": "no_changes"}
+
+    # Fetch once: the same records are hashed and, if changed, re-indexed
+    records = fetch_sheet_data(COMPANY_QA_SPREADSHEET_ID, COMPANY_QA_SHEET_NAME)
+    current_hash = hash_records(records)
     last_hash = get_last_hash()
 
     if current_hash == last_hash:
         logger.info("No changes detected. Skipping re-index.")
+        save_hash(current_hash, version)
         return {"status": "skipped", "reason": "no_changes"}
 
     logger.info("Changes detected. Triggering re-index...")
     result = reindex_company_qa(
-        COMPANY_QA_SPREADSHEET_ID, COMPANY_QA_SHEET_NAME
+        COMPANY_QA_SPREADSHEET_ID, COMPANY_QA_SHEET_NAME, records=records
     )
 
-    save_hash(current_hash)
+    save_hash(current_hash, version)
     result["triggered_by"] = "scheduled_sync"
     return result
 
 
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
+    init_db()
     result = sync_if_changed()
     print(result)
@@ -8,6 +8,8 @@ Google Sheet. Handles both minimal (question, answer) and enhanced
 
 import json
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Optional
 
 from google.oauth2.service_account import Credentials
@@ -20,26 +22,186 @@ from app.config import (
 
 logger = logging.getLogger(__name__)
 
-SCOPES = ["https://www.googleapis.com/auth/spreadsheets.readonly"]
-REQUIRED_COLUMNS = {"question", "answer"}
+SCOPES = [
+    "https://www.googleapis.com/auth/spreadsheets.readonly",
+    "https://www.googleapis.com/auth/drive.metadata.readonly",
+]
+REQUIRED_COLUMNS = frozenset(("question", "answer"))
+RECOGNIZED_COLUMNS = REQUIRED_COLUMNS | {"link", "category", "keywords", "active", "id"}
 
+# Sheets are read in pages of this many rows, fetched concurrently. The
+# pool is long-lived so its threads keep their cached API clients.
+SHEET_PAGE_ROWS = 2000
+SHEET_FETCH_WORKERS = 8
+_page_executor = ThreadPoolExecutor(
+    max_workers=SHEET_FETCH_WORKERS, thread_name_prefix="sheets-fetch"
+)
 
-def get_sheets_service():
-    """Initialize the Google Sheets API client using service account credentials."""
+# Common spellings of an active (TRUE) cell, matched without allocating;
+# anything else falls back to the strip/upper comparison
+_ACTIVE_VALUES = frozenset(("TRUE", "True", "true"))
+
+
+_credentials = None
+_credentials_lock = threading.Lock()
+
+# googleapiclient's HTTP transport is not thread-safe, so each thread (the
+# scheduler, the reindex threadpool) keeps its own service object
+_local = threading.local()
+
+
+def get_credentials():
+    """Load the service account credentials once; they refresh their own token."""
+    global _credentials
+    if _credentials is None:
+        with _credentials_lock:
+            if _credentials is None:
+                _credentials = _load_credentials()
+    return _credentials
+
+
+def _load_credentials():
     if GOOGLE_SERVICE_ACCOUNT_JSON and GOOGLE_SERVICE_ACCOUNT_JSON.strip():
         creds_info = json.loads(GOOGLE_SERVICE_ACCOUNT_JSON)
-        creds = Credentials.from_service_account_info(creds_info, scopes=SCOPES)
-    elif GOOGLE_SERVICE_ACCOUNT_FILE and GOOGLE_SERVICE_ACCOUNT_FILE.strip():
-        creds = Credentials.from_service_account_file(
+        return Credentials.from_service_account_info(creds_info, scopes=SCOPES)
+    if GOOGLE_SERVICE_ACCOUNT_FILE and GOOGLE_SERVICE_ACCOUNT_FILE.strip():
+        return Credentials.from_service_account_file(
             GOOGLE_SERVICE_ACCOUNT_FILE, scopes=SCOPES
         )
-    else:
-        raise ValueError(
-            "No Google credentials configured. "
-            "Set GOOGLE_SERVICE_ACCOUNT_JSON or GOOGLE_SERVICE_ACCOUNT_FILE."
+    raise ValueError(
+        "No Google credentials configured. "
+        "Set GOOGLE_SERVICE_ACCOUNT_JSON or GOOGLE_SERVICE_ACCOUNT_FILE."
+    )
+
+
+def _get_service(api: str, version: str):
+    """
+    Return this thread's client for `api`, building it on first use from the
+    bundled discovery document so repeat syncs reuse its connection.
+    """
+    attr = f"{api}_service"
+    service = getattr(_local, attr, None)
+    if service is None:
+        service = build(
+            api,
+            version,
+            credentials=get_credentials(),
+            cache_discovery=False,
+            static_discovery=True,
+        )
+        setattr(_local, attr, service)
+    return service
+
+
+def get_sheets_service():
+    """Return this thread's Google Sheets API client."""
+    return _get_service("sheets", "v4")
+
+
+def get_drive_service():
+    """Return this thread's Google Drive API client (file metadata only)."""
+    return _get_service("drive", "v3")
+
+
+def fetch_sheet_version(spreadsheet_id: str) -> str:
+    """
+    Return the spreadsheet's Drive revision stamp ("modifiedTime/version").
+
+    One small metadata request; the stamp changes whenever any cell does,
+    so an unchanged stamp means the sheet need not be downloaded.
+    """
+    metadata = (
+        get_drive_service()
+        .files()
+        .get(fileId=spreadsheet_id, fields="modifiedTime,version")
+        .execute()
+    )
+    return f"{metadata['modifiedTime']}/{metadata['version']}"
+
+
+def _column_letter(index: int) -> str:
+    """A1-notation letters for a 0-based column index (0 -> A, 26 -> AA)."""
+    letters = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(ord("A") + remainder) + letters
+    return letters
+
+
+def _fetch_rows(
+    spreadsheet_id: str, sheet_name: str, first_row: int, last_column: str
+) -> list:
+    """Fetch one page of SHEET_PAGE_ROWS rows, columns A..`last_column`."""
+    range_str = (
+        f"{sheet_name}!A{first_row}:{last_column}{first_row + SHEET_PAGE_ROWS - 1}"
+    )
+    result = (
+        get_sheets_service()
+        .spreadsheets()
+        .values()
+        .get(spreadsheetId=spreadsheet_id, range=range_str, fields="values")
+        .execute()
+    )
+    return result.get("values", [])
+
+
+def _fetch_layout(spreadsheet_id: str, sheet_name: str) -> tuple:
+    """
+    Return (row_count, headers): the sheet's grid row count (including
+    empty rows) and its full-width header row, in one request.
+    """
+    result = (
+        get_sheets_service()
+        .spreadsheets()
+        .get(
+            spreadsheetId=spreadsheet_id,
+            ranges=f"{sheet_name}!1:1",
+            fields=(
+                "sheets(properties/gridProperties/rowCount,"
+                "data/rowData/values/formattedValue)"
+            ),
         )
+        .execute()
+    )
+    sheet = result["sheets"][0]
+    row_data = sheet.get("data", [{}])[0].get("rowData", [])
+    cells = row_data[0].get("values", []) if row_data else []
+    headers = [cell.get("formattedValue", "") for cell in cells]
+    return sheet["properties"]["gridProperties"]["rowCount"], headers
+
+
+def _fetch_all_rows(spreadsheet_id: str, sheet_name: str) -> list:
+    """
+    Fetch every row of the sheet, up to its last recognized column, paging
+    large sheets in parallel.
+    """
+    # Columns right of the last recognized header are never read, wherever
+    # that header sits. Pages are sized by rowCount: a short page proves
+    # nothing, since the API trims trailing empty rows of the requested
+    # range, not of the sheet.
+    row_count, headers = _fetch_layout(spreadsheet_id, sheet_name)
+    recognized = [
+        i for i, header in enumerate(headers)
+        if header.strip().lower() in RECOGNIZED_COLUMNS
+    ]
+    # Without any, read the whole header so the required-column check reports it
+    last_column = _column_letter(recognized[-1] if recognized else max(len(headers) - 1, 0))
 
-    return build("sheets", "v4", credentials=creds)
+    pages = _page_executor.map(
+        lambda first_row: _fetch_rows(spreadsheet_id, sheet_name, first_row, last_column),
+        range(1, row_count + 1, SHEET_PAGE_ROWS),
+    )
+
+    rows = []
+    for page_number, page in enumerate(pages):
+        # Pad to the page boundary so every row keeps its sheet row number
+        rows.extend([[]] * (page_number * SHEET_PAGE_ROWS - len(rows)))
+        rows.extend(page)
+
+    while rows and not rows[-1]:
+        rows.pop()
+    return rows
 
 
 def fetch_sheet_data(
@@ -55,21 +217,12 @@ def fetch_sheet_data(
     - Short rows (padded with empty strings)
     - Inactive rows (skipped if 'active' column exists and value != TRUE)
     """
-    service = get_sheets_service()
-    range_str = f"{sheet_name}!A:Z"
-
     try:
-        result = (
-            service.spreadsheets()
-            .values()
-            .get(spreadsheetId=spreadsheet_id, range=range_str)
-            .execute()
-        )
+        rows = _fetch_all_rows(spreadsheet_id, sheet_name)
     except Exception as e:
         logger.error(f"Failed to fetch sheet data: {e}")
         raise
 
-    rows = result.get("values", [])
     if len(rows) < 2:
         logger.warning("Sheet is empty or has only headers")
         return []
@@ -77,32 +230,40 @@ def fetch_sheet_data(
     # Parse headers (lowercase, stripped)
     headers = [h.strip().lower() for h in rows[0]]
 
+    # Column positions (last occurrence wins, as with dict(zip(headers, row))),
+    # so rows can be filtered before any dict is built
+    column = {name: i for i, name in enumerate(headers)}
+
     # Validate required columns
-    missing = REQUIRED_COLUMNS - set(headers)
+    missing = REQUIRED_COLUMNS - column.keys()
     if missing:
         logger.error(f"Missing required columns: {missing}")
         raise ValueError(f"Sheet is missing required columns: {missing}")
 
-    has_active_column = "active" in headers
+    question_col = column["question"]
+    answer_col = column["answer"]
+    active_col = column.get("active")
+    width = len(headers)
     records = []
 
     for i, row in enumerate(rows[1:], start=2):
-        # Pad short rows
-        padded = row + [""] * (len(headers) - len(row))
-        record = dict(zip(headers, padded))
-        record["_row_number"] = i
-
         # Skip inactive rows (only if 'active' column exists)
-        if has_active_column:
-            if record.get("active", "").strip().upper() != "TRUE":
+        if active_col is not None:
+            if active_col >= len(row):
+                continue
+            active = row[active_col]
+            if active not in _ACTIVE_VALUES and active.strip().upper() != "TRUE":
                 continue
 
         # Skip rows with empty question or answer
-        question = record.get("question", "").strip()
-        answer = record.get("answer", "").strip()
-        if not question or not answer:
+        if question_col >= len(row) or not row[question_col].strip():
+            continue
+        if answer_col >= len(row) or not row[answer_col].strip():
             continue
 
+        # Pad short rows
+        record = dict(zip(headers, row + [""] * (width - len(row))))
+        record["_row_number"] = i
         records.append(record)
 
     logger.info(f"Fetched {len(records)} active records from sheet (rows scanned: {len(rows) - 1})")
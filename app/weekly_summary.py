@@ -0,0 +1,96 @@
+"""
+Weekly summary job — generates the management summary via the OpenAI Batch API.
+
+Runs once a week (e.g., Monday 00:00 via cron). The summary has no
+real-time requirement, so it goes through the Batch API at half the cost,
+and the analytics endpoint serves the stored result instantly.
+"""
+
+import io
+import json
+import logging
+import time
+
+from openai import OpenAI
+
+from app.config import OPENAI_API_KEY
+from app.models import init_db
+from app.analytics import (
+    collect_weekly_summary_data,
+    build_weekly_summary_request,
+    save_weekly_summary,
+)
+
+logger = logging.getLogger(__name__)
+openai_client = OpenAI(api_key=OPENAI_API_KEY)
+
+POLL_INTERVAL_SECONDS = 60
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+def submit_weekly_summary_batch(data_summary: str) -> str:
+    """Upload a one-request JSONL file and create a batch. Returns the batch ID."""
+    line = json.dumps({
+        "custom_id": "weekly-summary",
+        "method": "POST",
+        "url": "/v1/chat/completions",
+        "body": build_weekly_summary_request(data_summary),
+    }, ensure_ascii=False)
+
+    input_file = openai_client.files.create(
+        file=("weekly_summary.jsonl", io.BytesIO(line.encode("utf-8"))),
+        purpose="batch",
+    )
+    batch = openai_client.batches.create(
+        input_file_id=input_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h",
+    )
+    logger.info(f"Submitted weekly summary batch {batch.id}")
+    return batch.id
+
+
+def wait_for_batch(batch_id: str):
+    """Poll the batch until it reaches a terminal status and return it."""
+    while True:
+        batch = openai_client.batches.retrieve(batch_id)
+        if batch.status in TERMINAL_STATUSES:
+            return batch
+        logger.info(f"Batch {batch_id} status: {batch.status}")
+        time.sleep(POLL_INTERVAL_SECONDS)
+
+
+def read_batch_answer(batch) -> str:
+    """Extract the summary text from a completed batch's output file."""
+    output = openai_client.files.content(batch.output_file_id).text
+    result = json.loads(output.strip().splitlines()[0])
+    if result.get("error"):
+        raise RuntimeError(f"Weekly summary request failed: {result['error']}")
+    return result["response"]["body"]["choices"][0]["message"]["content"]
+
+
+def run_weekly_summary_job() -> dict:
+    """
+    Collect the past week's stats, generate the summary through the
+    Batch API, and store it. Returns a summary dict.
+    """
+    logger.info("Weekly summary: collecting stats...")
+    data = collect_weekly_summary_data()
+
+    batch_id = submit_weekly_summary_batch(data["data_summary"])
+    batch = wait_for_batch(batch_id)
+
+    if batch.status != "completed" or not batch.output_file_id:
+        logger.error(f"Weekly summary batch {batch_id} ended with status: {batch.status}")
+        return {"status": "failed", "batch_id": batch_id, "batch_status": batch.status}
+
+    payload = save_weekly_summary(data["stats"], read_batch_answer(batch))
+    logger.info("Weekly summary stored.")
+    return {"status": "success", "batch_id": batch_id, "generated_at": payload["generated_at"]}
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    init_db()
+    result = run_weekly_summary_job()
+    print(result)
@@ -0,0 +1,21 @@
+import os
+import tempfile
+
+# Point the app at a throwaway SQLite database before app.config is imported
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/test.db"
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+import pytest
+
+from app.models import SessionLocal, Base, engine, init_db
+
+
+@pytest.fixture
+def db():
+    init_db()
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
@@ -0,0 +1,157 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import orjson
+from sqlalchemy import Integer
+from sqlalchemy.dialects import postgresql
+
+from app import analytics
+from app.analytics import (
+    _query_counts,
+    _ranked_queries_select,
+    collect_weekly_summary_data,
+    get_category_breakdown,
+    get_low_confidence_responses,
+    get_top_questions,
+    get_unanswered_questions,
+)
+from app.logger import log_interactions
+from app.models import Message, WeeklySummary
+from app.rollup import refresh_daily_rollup
+
+
+def _log(*queries, answer="ok", confidence=0.8, sources=(), timestamp=None):
+    log_interactions([
+        {
+            "session_id": f"s{i % 2}",
+            "query": query,
+            "answer": answer,
+            "confidence": confidence,
+            "sources": list(sources),
+            "matches_found": 1,
+            "latency_seconds": 0.1,
+            "model": "test",
+            "timestamp": timestamp,
+        }
+        for i, query in enumerate(queries)
+    ])
+
+
+def test_top_question_counts_are_ints(db):
+    _log("How do I pay?", "how do i pay", "Refunds?")
+
+    result = get_top_questions(days=7, force=True)
+
+    assert result["total_messages"] == 3
+    assert type(result["total_messages"]) is int
+    assert [q["count"] for q in result["top_questions"]] == [2, 1]
+    assert all(type(q["count"]) is int for q in result["top_questions"])
+
+
+def test_weekly_summary_data_serializes(db):
+    _log("How do I pay?", "how do i pay")
+
+    data = collect_weekly_summary_data()
+
+    summary = orjson.loads(data["data_summary"])
+    assert summary["top"] == [{"q": "How do I pay?", "n": 2}]
+
+
+def test_ranked_query_counts_cast_on_postgres(db):
+    since = datetime.now(timezone.utc) - timedelta(days=7)
+    statement = _ranked_queries_select(_query_counts(db, since), 10)
+
+    # Postgres sums integers as numeric; the cast keeps counts plain ints
+    assert isinstance(statement.selected_columns["count"].type, Integer)
+    sql = str(statement.compile(dialect=postgresql.dialect()))
+    assert "CAST(sum(" in sql and "AS INTEGER)" in sql
+
+
+def test_totals_combine_rollup_and_recent_messages(db):
+    three_days_ago = datetime.now(timezone.utc) - timedelta(days=3)
+    _log("How do I pay?", timestamp=three_days_ago)
+    _log("Refunds?", answer="很抱歉，我目前無法回答這個問題。", timestamp=three_days_ago)
+    _log("Hours?", confidence=0.1, timestamp=three_days_ago)
+    _log("How do I pay?", confidence=0.1)
+    refresh_daily_rollup()
+
+    # Rolled-up days are read from the rollup only
+    db.query(Message).filter(Message.timestamp < datetime.now(timezone.utc) - timedelta(days=1)).delete()
+    db.commit()
+
+    unanswered = get_unanswered_questions(days=7, force=True)
+    assert (unanswered["total_unanswered"], unanswered["total_messages"]) == (1, 4)
+
+    low = get_low_confidence_responses(days=7, force=True)
+    assert (low["total_low_confidence"], low["total_messages"]) == (2, 4)
+
+    top = get_top_questions(days=7, force=True)
+    assert top["total_messages"] == 4
+    assert top["top_questions"][0] == {"question": "How do I pay?", "count": 2, "avg_confidence": 0.45}
+
+    stats = collect_weekly_summary_data()["stats"]
+    assert stats["total_messages"] == 4
+    assert stats["unanswered_count"] == 1
+    assert stats["low_confidence_count"] == 2
+    assert stats["avg_confidence"] == round((0.8 + 0.8 + 0.1 + 0.1) / 4, 4)
+    assert type(stats["total_messages"]) is int
+
+
+def test_category_breakdown_combines_rollup_and_recent_messages(db):
+    three_days_ago = datetime.now(timezone.utc) - timedelta(days=3)
+    billing, hours = {"category": "Billing"}, {"category": "Hours"}
+    _log("How do I pay?", sources=[billing, hours], timestamp=three_days_ago)
+    _log("Refunds?", sources=[billing, {"category": ""}], timestamp=three_days_ago)
+    _log("How do I pay?", sources=[billing])
+    refresh_daily_rollup()
+
+    db.query(Message).filter(Message.timestamp < datetime.now(timezone.utc) - timedelta(days=1)).delete()
+    db.commit()
+
+    result = get_category_breakdown(days=7, force=True)
+
+    assert result["total_categorized_matches"] == 4
+    assert [(c["category"], c["count"]) for c in result["categories"]] == [("Billing", 3), ("Hours", 1)]
+    assert all(type(c["count"]) is int for c in result["categories"])
+
+
+class _FakeCompletions:
+    def __init__(self):
+        self.calls = 0
+
+    def create(self, **kwargs):
+        self.calls += 1
+        message = SimpleNamespace(content=f"summary {self.calls}")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+def test_stale_weekly_summary_is_regenerated(db, monkeypatch):
+    completions = _FakeCompletions()
+    monkeypatch.setattr(
+        analytics, "openai_client", SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    )
+    today = datetime.now(timezone.utc).date()
+
+    db.add(WeeklySummary(date=today - timedelta(days=3), payload={"summary": "recent"}))
+    db.commit()
+    assert analytics.generate_weekly_summary()["summary"] == "recent"
+    assert completions.calls == 0
+
+    db.query(WeeklySummary).delete()
+    db.add(WeeklySummary(date=today - timedelta(days=30), payload={"summary": "old"}))
+    db.commit()
+    assert analytics.generate_weekly_summary()["summary"] == "summary 1"
+    assert completions.calls == 1
+
+
+def test_asked_at_matches_isoformat(db):
+    whole_second = datetime(2026, 1, 5, 9, 30, 0)
+    fractional = datetime(2026, 1, 5, 9, 31, 0, 120000)
+    for timestamp in (whole_second, fractional):
+        _log("Refunds?", answer="很抱歉，我目前無法回答這個問題。", timestamp=timestamp)
+
+    result = get_unanswered_questions(days=36500, force=True)
+
+    assert [q["asked_at"] for q in result["unanswered_questions"]] == [
+        fractional.isoformat(), whole_second.isoformat(),
+    ]
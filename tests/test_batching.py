@@ -0,0 +1,44 @@
+import asyncio
+
+from app.batching import QueueBatcher
+from app.logger import InteractionLogWriter
+from app.models import Message
+
+
+class _Collector(QueueBatcher):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.batches = []
+
+    async def add(self, item):
+        await self._put(item)
+
+    async def _handle_batch(self, batch):
+        self.batches.append(batch)
+
+
+def test_batches_are_capped_and_windowed():
+    async def run():
+        collector = _Collector(max_batch_size=3, window_seconds=0.05)
+        for i in range(5):
+            await collector.add(i)
+        await asyncio.sleep(0.1)
+        await collector.add(5)
+        await asyncio.sleep(0.1)
+        return collector.batches
+
+    assert asyncio.run(run()) == [[0, 1, 2], [3, 4], [5]]
+
+
+def test_log_writer_flush_writes_everything(db):
+    async def run():
+        writer = InteractionLogWriter(max_batch_size=2, window_seconds=0.01)
+        for i in range(5):
+            await writer.enqueue(
+                session_id="s", query=f"q{i}", answer="ok", confidence=0.9,
+                sources=[], matches_found=1, latency_seconds=0.1, model="test",
+            )
+        await writer.flush()
+
+    asyncio.run(run())
+    assert db.query(Message).count() == 5
@@ -0,0 +1,101 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select
+
+from app.analytics import _query_counts, _split_period
+from app.logger import log_interactions
+from app.models import CategoryDailyRollup, Message, MessageDailyRollup
+from app.rollup import day_start, get_rollup_watermark, refresh_daily_rollup
+
+
+def _log(query, timestamp=None, confidence=0.8, sources=()):
+    log_interactions([{
+        "session_id": "s",
+        "query": query,
+        "answer": "ok",
+        "confidence": confidence,
+        "sources": list(sources),
+        "matches_found": 1,
+        "latency_seconds": 0.1,
+        "model": "test",
+        "timestamp": timestamp,
+    }])
+
+
+def _days_ago(days):
+    return datetime.now(timezone.utc) - timedelta(days=days)
+
+
+def test_empty_rollup_has_no_watermark(db):
+    assert get_rollup_watermark(db) is None
+    assert refresh_daily_rollup() == {"status": "skipped", "reason": "no_messages"}
+
+
+def test_rollup_covers_complete_days_only(db):
+    _log("How do I pay?", timestamp=_days_ago(1), confidence=0.5)
+    _log("how do i pay", timestamp=_days_ago(1), confidence=0.1)
+    _log("How do I pay?")
+
+    result = refresh_daily_rollup()
+
+    today = datetime.now(timezone.utc).date()
+    assert result["status"] == "success"
+    assert get_rollup_watermark(db) == today
+    rows = db.execute(select(MessageDailyRollup)).scalars().all()
+    assert [(r.query_normalized, r.message_count, r.low_confidence_count) for r in rows] == [
+        ("how do i pay", 2, 1),
+    ]
+    assert rows[0].confidence_sum == 0.6
+
+
+def test_rollup_rerun_is_idempotent(db):
+    _log("How do I pay?", timestamp=_days_ago(3), sources=[{"category": "Billing"}])
+    refresh_daily_rollup()
+
+    # Days after the last one with messages are rescanned, but add nothing
+    assert refresh_daily_rollup()["rows"] == 0
+    assert db.query(MessageDailyRollup).count() == 1
+    assert db.query(CategoryDailyRollup).count() == 1
+
+    _log("Refunds?", timestamp=_days_ago(1))
+    refresh_daily_rollup()
+    assert refresh_daily_rollup() == {"status": "skipped", "reason": "up_to_date"}
+    assert db.query(MessageDailyRollup).count() == 2
+
+
+def test_split_period_reads_raw_without_rollup(db):
+    since = _days_ago(7)
+
+    rollup_filter, raw_filter = _split_period(db, since)
+
+    assert rollup_filter is None
+    assert str(raw_filter.compile()) == str((Message.timestamp >= since).compile())
+
+
+def test_split_period_reads_partial_first_day_and_tail_raw(db):
+    since = _days_ago(7)
+    first_full_day = since.date() + timedelta(days=1)
+    _log("partial first day", timestamp=since + timedelta(seconds=1))
+    _log("rolled up", timestamp=day_start(first_full_day + timedelta(days=1)))
+    _log("today")
+    refresh_daily_rollup()
+
+    rollup_filter, raw_filter = _split_period(db, since)
+
+    raw = db.execute(select(Message.query).where(raw_filter)).scalars()
+    assert sorted(raw) == ["partial first day", "today"]
+    rolled = db.execute(select(MessageDailyRollup.query).where(rollup_filter)).scalars()
+    assert list(rolled) == ["rolled up"]
+
+
+def test_query_counts_combine_rollup_and_raw(db):
+    _log("How do I pay?", timestamp=_days_ago(3), confidence=0.5)
+    refresh_daily_rollup()
+    db.query(Message).filter(Message.timestamp < day_start(get_rollup_watermark(db))).delete()
+    db.commit()
+    _log("how do i pay", confidence=0.3)
+
+    counts = _query_counts(db, _days_ago(7))
+    rows = db.execute(select(counts.c.query_normalized, counts.c.message_count)).all()
+
+    assert sorted(rows) == [("how do i pay", 1), ("how do i pay", 1)]
@@ -0,0 +1,33 @@
+from app.scheduled_sync import hash_records
+
+
+RECORDS = [
+    {"question": "How do I pay?", "answer": "By card.", "_row_number": 2},
+    {"question": "Refunds?", "answer": "Within 30 days.", "_row_number": 3},
+    {"question": "Hours?", "answer": "9 to 5.", "_row_number": 5},
+]
+
+
+def test_hash_ignores_fetch_order():
+    assert hash_records(list(reversed(RECORDS))) == hash_records(RECORDS)
+    assert hash_records([RECORDS[1], RECORDS[2], RECORDS[0]]) == hash_records(RECORDS)
+
+
+def test_hash_ignores_key_order():
+    reordered = [dict(reversed(list(record.items()))) for record in RECORDS]
+
+    assert hash_records(reordered) == hash_records(RECORDS)
+
+
+def test_hash_changes_with_content_and_row_order():
+    edited = [dict(RECORDS[0], answer="By card or transfer."), *RECORDS[1:]]
+    # Same records, but rows 2 and 3 swapped in the sheet
+    moved = [
+        dict(RECORDS[0], _row_number=3),
+        dict(RECORDS[1], _row_number=2),
+        RECORDS[2],
+    ]
+
+    assert hash_records(edited) != hash_records(RECORDS)
+    assert hash_records(moved) != hash_records(RECORDS)
+
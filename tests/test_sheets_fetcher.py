@@ -0,0 +1,126 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app import sheets_fetcher
+
+
+def _column_index(letters):
+    index = 0
+    for letter in letters:
+        index = index * 26 + ord(letter) - ord("A") + 1
+    return index - 1
+
+
+def _fake_sheet(monkeypatch, sheet, row_count):
+    """Serve `sheet` (list of rows) the way the Sheets API pages it."""
+    requested = []
+
+    def fetch_rows(spreadsheet_id, sheet_name, first_row, last_column):
+        requested.append((first_row, last_column))
+        width = _column_index(last_column) + 1
+        page = [
+            row[:width]
+            for row in sheet[first_row - 1:first_row - 1 + sheets_fetcher.SHEET_PAGE_ROWS]
+        ]
+        # The API trims trailing empty rows of the requested range
+        while page and not page[-1]:
+            page = page[:-1]
+        return page
+
+    monkeypatch.setattr(sheets_fetcher, "_fetch_rows", fetch_rows)
+    monkeypatch.setattr(
+        sheets_fetcher, "_fetch_layout", lambda *a: (row_count, sheet[0] if sheet else [])
+    )
+    monkeypatch.setattr(sheets_fetcher, "SHEET_PAGE_ROWS", 10)
+    return requested
+
+
+def test_rows_after_a_blank_page_end_are_kept(monkeypatch):
+    sheet = [["question", "answer"]] + [[f"q{i}", f"a{i}"] for i in range(2, 26)]
+    sheet[7:10] = [[], [], []]  # rows 8-10 blank: the first page comes back short
+    _fake_sheet(monkeypatch, sheet, row_count=30)
+
+    records = sheets_fetcher.fetch_sheet_data("sheet-id")
+
+    row_numbers = [r["_row_number"] for r in records]
+    assert row_numbers == [2, 3, 4, 5, 6, 7] + list(range(11, 26))
+    assert all(r["question"] == f"q{r['_row_number']}" for r in records)
+
+
+def test_pages_are_padded_to_their_boundaries(monkeypatch):
+    sheet = [["question", "answer"]] + [[f"q{i}", f"a{i}"] for i in range(2, 36)]
+    sheet[15:20] = [[]] * 5  # rows 16-20: page 2 comes back short
+    sheet[20:30] = [[]] * 10  # rows 21-30: page 3 comes back empty
+    requested = _fake_sheet(monkeypatch, sheet, row_count=40)
+
+    rows = sheets_fetcher._fetch_all_rows("sheet-id", "Sheet1")
+
+    assert requested == [(1, "B"), (11, "B"), (21, "B"), (31, "B")]
+    assert len(rows) == 35
+    for row_number, row in enumerate(rows, start=1):
+        assert row == sheet[row_number - 1]
+
+
+def test_trailing_empty_pages_are_trimmed(monkeypatch):
+    sheet = [["question", "answer"]] + [[f"q{i}", f"a{i}"] for i in range(2, 13)]
+    requested = _fake_sheet(monkeypatch, sheet, row_count=50)
+
+    rows = sheets_fetcher._fetch_all_rows("sheet-id", "Sheet1")
+
+    assert len(requested) == 5
+    assert rows == sheet
+
+
+def test_single_page_sheet(monkeypatch):
+    sheet = [["question", "answer", "active"], ["q", "a", "TRUE"], ["x", "y", "FALSE"]]
+    _fake_sheet(monkeypatch, sheet, row_count=1000)
+
+    records = sheets_fetcher.fetch_sheet_data("sheet-id")
+
+    assert records == [{"question": "q", "answer": "a", "active": "TRUE", "_row_number": 2}]
+
+
+def test_recognized_column_beyond_g_is_read(monkeypatch):
+    header = ["question", "answer", "notes", "", "", "", "", "", "active", "extra"]
+    sheet = [
+        header,
+        ["q1", "a1", "n", "", "", "", "", "", "TRUE", "x"],
+        ["q2", "a2", "n", "", "", "", "", "", "FALSE", "x"],
+    ]
+    requested = _fake_sheet(monkeypatch, sheet, row_count=3)
+
+    records = sheets_fetcher.fetch_sheet_data("sheet-id")
+
+    # Inactive rows stay filtered; nothing right of the last recognized column is read
+    assert [r["question"] for r in records] == ["q1"]
+    assert requested == [(1, "I")]
+    assert "extra" not in records[0]
+
+
+def test_missing_required_column_still_raises(monkeypatch):
+    sheet = [["title", "body"], ["t", "b"]]
+    _fake_sheet(monkeypatch, sheet, row_count=2)
+
+    with pytest.raises(ValueError, match="question"):
+        sheets_fetcher.fetch_sheet_data("sheet-id")
+
+
+def test_layout_reads_row_count_and_full_header(monkeypatch):
+    response = {"sheets": [{
+        "properties": {"gridProperties": {"rowCount": 1200}},
+        "data": [{"rowData": [{"values": [
+            {"formattedValue": "Question"}, {}, {"formattedValue": "active"},
+        ]}]}],
+    }]}
+    calls = []
+
+    def get(**kwargs):
+        calls.append(kwargs)
+        return SimpleNamespace(execute=lambda: response)
+
+    service = SimpleNamespace(spreadsheets=lambda: SimpleNamespace(get=get))
+    monkeypatch.setattr(sheets_fetcher, "get_sheets_service", lambda: service)
+
+    assert sheets_fetcher._fetch_layout("sheet-id", "Sheet1") == (1200, ["Question", "", "active"])
+    assert calls[0]["ranges"] == "Sheet1!1:1"